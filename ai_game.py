@@ -3,6 +3,7 @@ from pygame.examples.sprite_texture import renderer
 from game_core import GomokuGame
 from opengl_renderer import OpenGLRenderer
 from ai_player import AIPlayer
+from ai_worker import AIWorker
 import pygame
 import opengl_renderer
 
@@ -13,6 +14,8 @@ class AIGame:
         self.ai_player = AIPlayer(self.game, self.game.WHITE)  # AI后手（白棋）
         self.human_player = self.game.BLACK  # 人类先手（黑棋）
         self.ai_thinking = True   # True AI黑棋 / False 用户黑棋
+        self.ai_worker = AIWorker(self.ai_player)  # AI在后台线程中搜索，主循环保持60帧
+        self.ponder = True  # 轮到人类时AI在后台预先思考人类可能的应对（见AIWorker.ponder）
 
     def run(self):
         clock = pygame.time.Clock()
@@ -21,6 +24,7 @@ class AIGame:
         while running:
             for event in pygame.event.get():
                 if event.type == pygame.QUIT:
+                    self.ai_worker.cancel()
                     running = False
 
                 if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
@@ -32,21 +36,42 @@ class AIGame:
                                 self.ai_thinking = True
 
                 if event.type == pygame.KEYDOWN:
-                    if event.key == pygame.K_r:  # 重置游戏
+                    if event.key == pygame.K_r:  # 重置游戏（取消正在进行的AI搜索）
+                        self.ai_worker.cancel()
                         self.game.reset_game()
                         self.ai_thinking = False
+                    elif event.key == pygame.K_z and self.game.move_history:  # 悔棋（取消正在进行的AI搜索）
+                        self.ai_worker.cancel()
+                        # AI还没应对时只撤回自己的一步，否则连同AI的应对一起撤回
+                        self.game.undo()
+                        if not self.ai_thinking:
+                            self.game.undo()
+                        self.ai_thinking = False
                     elif event.key == pygame.K_ESCAPE:
+                        self.ai_worker.cancel()
                         running = False
 
-            # AI回合
+            # AI回合：后台线程搜索，这里每帧只轮询结果
             if not self.game.game_over and self.ai_thinking:
-                move = self.ai_player.find_best_move()
+                if not self.ai_worker.is_thinking():
+                    self.ai_worker.start()
+                move = self.ai_worker.poll()
                 if move:
                     row, col = move
                     self.game.make_move(row, col)
-                self.ai_thinking = False
+                    self.ai_thinking = False
+                    if self.ponder:
+                        self.ai_worker.ponder()
+
+            # 思考中提示（带动画的省略号）
+            if self.ai_worker.is_thinking():
+                dots = '.' * (pygame.time.get_ticks() // 400 % 4)
+                self.renderer.status_text = f"AI思考中{dots}"
+            else:
+                self.renderer.status_text = None
 
             self.renderer.render()
             clock.tick(60)   # 控制帧率，一般不需要修改
 
+        self.ai_worker.shutdown()
         pygame.quit()
\ No newline at end of file
@@ -1,12 +1,31 @@
+import time
 import numpy as np
 from collections import defaultdict, deque
 from typing import List, Tuple, Set, Optional
+from batch_eval import window_table, batch_evaluate
+from bitboard import BitBoard
+from evaluator import IncrementalEvaluator
+from move_ordering import MoveOrderer
+from opening_book import default_book
+from pattern_tables import pattern_tables
+from parallel_search import ParallelRootSearch
+from search_stats import SearchStats, DEBUG_EVENTS, format_event, profile_call
+from threat_search import ThreatSearcher
+import win_detector
+from transposition import (TranspositionTable, zobrist_hash, ZOBRIST_KEYS, ZOBRIST_SIDE,
+                           EXACT, LOWER, UPPER)
+
+
+class SearchAborted(Exception):
+    """搜索超出时间或节点预算"""
+
 
 class AIPlayer:
     """
     五子棋AI玩家类，基于Minimax算法和Alpha-Beta剪枝优化
     目前防守可以，但是攻击性不够, 当AI为黑棋时，会存在白棋四子但是黑棋不防的情况。
     应该是评分函数有问题，需要对进攻模式进行优化（本质是算法的问题），需要对白棋和黑棋的情况分开判断
+    冲四、活三引出的强制胜负由威胁空间搜索（threat_search.py）在Minimax之前先行处理
     """
 
     def __init__(self, game, player, debug_mode=True):
@@ -23,6 +42,17 @@ class AIPlayer:
         # 算法参数配置
         self.max_depth = 3  # 最大搜索深度
         self.expand_radius = 1  # 落子扩展半径
+        self.time_limit = None  # 每步思考时间上限（秒），设置后改用迭代加深
+        self.node_limit = None  # 每步搜索节点上限，设置后改用迭代加深
+        self.max_deepening_depth = 20  # 迭代加深的最大深度
+        self.max_width = None  # 非根节点只搜索排序后的前max_width个走法（None不裁剪）
+        self.use_threat_search = True  # Minimax之前先做双方的VCF/VCT搜索
+        self.threat_node_limit = 2000  # 每步VCF/VCT搜索（含防守点验证）共用的节点上限
+        self.threat_time_share = 0.5  # 设置time_limit时威胁搜索最多占用的时间比例，其余留给Minimax
+        self.parallel_workers = None  # 根节点并行搜索的进程数（None为单进程串行）
+        self.use_opening_book = True  # 开局阶段先查开局库（opening_book.py）
+        self.collect_stats = False  # 为True时每次搜索的统计保存在self.stats（search_stats.py）
+        self.trace_hook = None  # 搜索事件回调 hook(event, data)，设置后同样收集统计
         self.pattern_scores = {
             # 进攻模式评分（黑棋视角）  针对这种情况进行修改
             "B0000": 1, "0B000": 1, "00B00": 1, "000B0": 1, "0000B": 1,
@@ -41,66 +71,99 @@ class AIPlayer:
             "WWWW0": 100000, "WWW0W": 100000, "WW0WW": 100000, "W0WWW": 100000, "0WWWW": 100000,
             "WWWWW": 10000000
         }
+        self.board = None  # 搜索用位棋盘，由sync_board()在根节点构建
+        self.evaluator = None  # 与self.board同步的增量评估器
+        self.hash = 0  # 当前搜索局面的Zobrist哈希（不含轮次）
+        self.transposition_table = TranspositionTable()  # 跨回合保留，按需替换为其他大小
+        self.pv_table = {}  # 上一轮迭代主要变例上的局面 -> 走法
+        self.move_orderer = MoveOrderer()  # 历史启发与杀手走法
+        self.threat_searcher = ThreatSearcher()
+        self.opening_book = default_book()  # 随程序发布的开局库，文件不存在时为空库
+        self.parallel_search = None  # 按parallel_workers创建的进程池
+        self.search_depth = 0  # 当前这一轮根节点的搜索深度，用于换算层数
+        self.root_best = None  # 当前这一轮根节点已搜完的最佳(走法, 评分)
+        self.nodes = 0  # 本次搜索的节点数
+        self.deadline = None
+        self.cancel_event = None  # threading.Event，被set()时中断搜索（后台线程取消用）
+        self.stats = None  # 最近一次搜索的SearchStats（未开启统计时为None）
+        self.root_board = None  # 本次搜索根局面的副本，中断后据此恢复self.board
+        self.black_table = None
+        self.white_table = None
+        self.six_table = None  # pattern_scores中有六格棋型（如"0BBB00"）时的评分表
+        self.window_table = None  # 批量评估用：(整数下标评分表, 三进制编码评分表)
+
+    def build_pattern_tables(self) -> Tuple[List[int], List[int]]:
+        """
+        将pattern_scores转换为以5位掩码为下标的评分表（按内容缓存，见pattern_tables.py）
+        第k位对应棋型字符串的第k个字符
+        :return: (黑棋评分表, 白棋评分表)
+        """
+        return pattern_tables(self.pattern_scores)[:2]
 
-    def get_possible_moves(self) -> List[Tuple[int, int]]:
+    def sync_board(self):
+        """
+        根节点：拷贝GomokuGame维护的位棋盘作为搜索用位棋盘
+        搜索过程中只修改self.board，不再触碰self.game的状态
+        """
+        self.load_board(self.game.bitboard.copy())
+
+    def load_board(self, board: BitBoard):
+        """以给定的位棋盘作为搜索根局面，重建增量评估和哈希"""
+        self.board = board
+        tables = pattern_tables(self.pattern_scores)
+        if tables != (self.black_table, self.white_table, self.six_table):
+            # 评分表变化后旧的置换表分数不再可信
+            self.transposition_table.clear()
+        self.black_table, self.white_table, self.six_table = tables
+        self.hash = zobrist_hash(self.board)
+        self.evaluator = IncrementalEvaluator(self.board, self.black_table, self.white_table, self.six_table)
+
+    def place_stone(self, row: int, col: int, player: int):
+        """搜索中模拟落子：同时更新位棋盘、增量评估和哈希"""
+        self.board.place(row, col, player)
+        self.evaluator.update(row, col)
+        self.hash ^= ZOBRIST_KEYS[player - 1][row * 15 + col]
+
+    def remove_stone(self, row: int, col: int, player: int):
+        """搜索中撤销落子：同时更新位棋盘、增量评估和哈希"""
+        self.board.remove(row, col, player)
+        self.evaluator.update(row, col)
+        self.hash ^= ZOBRIST_KEYS[player - 1][row * 15 + col]
+
+    def position_key(self, is_maximizing: bool) -> int:
+        """置换表键：局面哈希再区分轮到哪一方"""
+        return self.hash ^ ZOBRIST_SIDE if is_maximizing else self.hash
+
+    def get_possible_moves(self, player: Optional[int] = None, ply: int = 0) -> List[Tuple[int, int]]:
         """
         获取可能的落子位置（基于扩展半径）
+        :param player: 给出时按该方的威胁分、历史表和杀手走法排序
+        :param ply: 距根节点的层数，大于0时按max_width裁剪
         :return: 可落子的(x,y)坐标列表
         """
-        board = self.game.board
-        moves = set()
-
-        # 查找已有棋子周围的空位
-        for i in range(15):
-            for j in range(15):
-                if board[i][j] != self.game.EMPTY:
-                    for dx in range(-self.expand_radius, self.expand_radius + 1):
-                        for dy in range(-self.expand_radius, self.expand_radius + 1):
-                            x, y = i + dx, j + dy
-                            if 0 <= x < 15 and 0 <= y < 15 and board[x][y] == self.game.EMPTY:
-                                moves.add((x, y))
+        # 占用掩码按扩展半径膨胀后去掉已有棋子，即为候选空位
+        moves = self.board.neighbor_moves(self.expand_radius)
 
         # 开局时返回中心点
         if not moves:
             return [(7, 7)]
-        return list(moves)
+        if player is not None:
+            width = self.max_width if ply > 0 else None
+            # 评估分 = ±总分（白棋AI取反）；AI希望评估分变大，对手希望变小
+            sign = 1 if self.player == self.game.BLACK else -1
+            if player != self.player:
+                sign = -sign
+            moves = self.move_orderer.order(self.board, moves, player, ply,
+                                            (self.black_table, self.white_table), sign, width)
+        return moves
 
     def evaluate_position(self) -> int:
         """
         评估当前棋盘局面
         :return: 局面评分（正数对AI有利）
         """
-        score = 0
-        board = self.game.board
-
-        # 转换棋盘状态为字符表示
-        def to_char(cell):
-            if cell == self.game.BLACK: return 'B'
-            if cell == self.game.WHITE: return 'W'
-            return '0'
-
-        # 检查所有可能的五元组
-        for i in range(15):
-            for j in range(15):
-                # 水平方向
-                if j + 4 < 15:
-                    pattern = ''.join([to_char(board[i][j + k]) for k in range(5)])
-                    score += self.pattern_scores.get(pattern, 0)
-
-                # 垂直方向
-                if i + 4 < 15:
-                    pattern = ''.join([to_char(board[i + k][j]) for k in range(5)])
-                    score += self.pattern_scores.get(pattern, 0)
-
-                # 对角线方向
-                if i + 4 < 15 and j + 4 < 15:
-                    pattern = ''.join([to_char(board[i + k][j + k]) for k in range(5)])
-                    score += self.pattern_scores.get(pattern, 0)
-
-                # 反对角线方向
-                if i + 4 < 15 and j - 4 >= 0:
-                    pattern = ''.join([to_char(board[i + k][j - k]) for k in range(5)])
-                    score += self.pattern_scores.get(pattern, 0)
+        # 五元组分数在落子/撤销时已增量更新，这里直接读取总分
+        score = self.evaluator.total
 
         # 如果是白棋AI，需要反转评分
         if self.player == self.game.WHITE:
@@ -108,57 +171,135 @@ class AIPlayer:
 
         return score
 
-    def minimax(self, depth: int, alpha: int, beta: int, is_maximizing: bool) -> int:
+    def evaluate_batch(self, boards) -> np.ndarray:
+        """
+        批量评估(N, 15, 15)的棋盘，结果与逐个调用evaluate_position相同（见batch_eval.py）
+        :return: (N,)的评分（正数对AI有利）
+        """
+        tables = pattern_tables(self.pattern_scores)
+        if self.window_table is None or self.window_table[0] is not tables:
+            self.window_table = (tables, window_table(*tables))
+        return batch_evaluate(boards, self.window_table[1], self.player)
+
+    def minimax(self, depth: int, alpha: int, beta: int, is_maximizing: bool,
+                last_move: Optional[Tuple[int, int]] = None) -> int:
         """
         Minimax算法核心，带Alpha-Beta剪枝
         :param depth: 当前搜索深度
         :param alpha: Alpha值
         :param beta: Beta值
         :param is_maximizing: 是否最大化层
+        :param last_move: 上一步落子，给出时只检查经过该点的四条线
         :return: 最佳评估值
         """
+        self.nodes += 1
+        self.check_budget()
+        stats = self.stats
+
         # 终止条件检查
-        winner = self.check_winner()
+        if last_move is not None:
+            row, col = last_move
+            mover = self.board.get(row, col)
+            winner = mover if self.board.is_five_at(row, col, mover) else None
+        else:
+            winner = self.check_winner()
         if winner == self.player:
             return 1000000 - depth  # 优先短路径胜利
         elif winner == self.opponent:
             return -1000000 + depth
-        elif depth == 0 or self.game.is_board_full():
+        elif depth == 0 or self.board.is_full():
+            if stats is not None:
+                stats.leaf_evals += 1
             return self.evaluate_position()
 
-        # 生成候选走法
-        moves = self.get_possible_moves()
+        # 查询置换表：足够深的结果直接使用或收紧窗口，否则只借用其最佳走法
+        key = self.position_key(is_maximizing)
+        entry = self.transposition_table.probe(key)
+        tt_move = None
+        if stats is not None:
+            stats.tt_probes += 1
+            stats.tt_hits += entry is not None
+        if entry is not None:
+            _, entry_depth, flag, entry_score, tt_move = entry
+            if entry_depth >= depth:
+                if flag == EXACT:
+                    if stats is not None:
+                        stats.tt_cutoffs += 1
+                    return entry_score
+                elif flag == LOWER:
+                    alpha = max(alpha, entry_score)
+                else:
+                    beta = min(beta, entry_score)
+                if beta <= alpha:
+                    if stats is not None:
+                        stats.tt_cutoffs += 1
+                    return entry_score
+        search_alpha, search_beta = alpha, beta
+
+        # 生成候选走法（上一轮主要变例的走法、置换表中的最佳走法优先，其余按启发式排序）
+        ply = self.search_depth - depth
+        mover = self.player if is_maximizing else self.opponent
+        moves = self.get_possible_moves(mover, ply)
         if not moves:
             return 0
+        tt_move = self.pv_table.get(key, tt_move)
+        if tt_move in moves:
+            moves.remove(tt_move)
+            moves.insert(0, tt_move)
 
+        best_move = None
         if is_maximizing:
             max_score = -float('inf')
             for move in moves:
                 # 模拟落子
-                self.game.board[move[0]][move[1]] = self.player
-                score = self.minimax(depth - 1, alpha, beta, False)
+                self.place_stone(move[0], move[1], self.player)
+                score = self.minimax(depth - 1, alpha, beta, False, move)
                 # 撤销落子
-                self.game.board[move[0]][move[1]] = self.game.EMPTY
+                self.remove_stone(move[0], move[1], self.player)
 
-                max_score = max(max_score, score)
+                if score > max_score:
+                    max_score = score
+                    best_move = move
                 alpha = max(alpha, score)
                 if beta <= alpha:
+                    self.move_orderer.record_cutoff(move, mover, depth, ply)
+                    if stats is not None:
+                        stats.record_cutoff(ply)
                     break  # Alpha-Beta剪枝
-            return max_score
+            best_score = max_score
         else:
             min_score = float('inf')
             for move in moves:
                 # 模拟对手落子
-                self.game.board[move[0]][move[1]] = self.opponent
-                score = self.minimax(depth - 1, alpha, beta, True)
+                self.place_stone(move[0], move[1], self.opponent)
+                score = self.minimax(depth - 1, alpha, beta, True, move)
                 # 撤销落子
-                self.game.board[move[0]][move[1]] = self.game.EMPTY
+                self.remove_stone(move[0], move[1], self.opponent)
 
-                min_score = min(min_score, score)
+                if score < min_score:
+                    min_score = score
+                    best_move = move
                 beta = min(beta, score)
                 if beta <= alpha:
+                    self.move_orderer.record_cutoff(move, mover, depth, ply)
+                    if stats is not None:
+                        stats.record_cutoff(ply)
                     break  # Alpha-Beta剪枝
-            return min_score
+            best_score = min_score
+
+        if stats is not None:
+            stats.interior_nodes += 1
+            # 剪枝时最后搜索的走法就是best_move（分数严格大于之前的最佳）
+            stats.moves_searched += moves.index(best_move) + 1 if beta <= alpha else len(moves)
+        # 写入置换表：超出搜索窗口的结果只是上/下界
+        if best_score <= search_alpha:
+            flag = UPPER
+        elif best_score >= search_beta:
+            flag = LOWER
+        else:
+            flag = EXACT
+        self.transposition_table.store(key, depth, flag, best_score, best_move)
+        return best_score
 
     # 只传self的胜利判定————跟game_core()中check_win区别
     # 检查当前棋盘是否有五子连珠————两个或许可以
@@ -168,68 +309,254 @@ class AIPlayer:
         检查当前棋盘是否有获胜方
         :return: 获胜方（BLACK/WHITE）或None
         """
-        board = self.game.board
-        # 检查所有可能的五连珠
-        for i in range(15):
-            for j in range(15):
-                if board[i][j] == self.game.EMPTY:
-                    continue
+        # 整盘掩码做移位与运算，检查所有可能的五连珠；尚未构建位棋盘时直接检查game.board
+        if self.board is None:
+            return win_detector.find_winner(self.game.board)
+        return self.board.winner()
 
-                # 水平方向
-                if j + 4 < 15 and all(board[i][j + k] == board[i][j] for k in range(5)):
-                    return board[i][j]
-
-                # 垂直方向
-                if i + 4 < 15 and all(board[i + k][j] == board[i][j] for k in range(5)):
-                    return board[i][j]
-
-                # 对角线方向
-                if i + 4 < 15 and j + 4 < 15 and all(board[i + k][j + k] == board[i][j] for k in range(5)):
-                    return board[i][j]
-
-                # 反对角线方向
-                if i + 4 < 15 and j - 4 >= 0 and all(board[i + k][j - k] == board[i][j] for k in range(5)):
-                    return board[i][j]
-        return None
-
-    def find_best_move(self) -> Tuple[int, int]: # 元组类型，顺序+数量+类型固定
+    def search_root(self, moves: List[Tuple[int, int]], depth: int) -> Tuple[Optional[Tuple[int, int]], float]:
         """
-        寻找最佳落子位置
-        :return: (x, y) 最佳落子坐标
+        以固定深度搜索根节点的所有走法
+        搜索过程中把当前最佳结果写入self.root_best，超时中断时可以读取部分结果
+        :param moves: 根节点候选走法
+        :param depth: 搜索深度
+        :return: (最佳走法, 评分)
         """
+        if self.parallel_workers:
+            return self.parallel_search.search_root(self, moves, depth)
+
         best_score = -float('inf')
         best_move = None
         alpha = -float('inf')
         beta = float('inf')
+        self.root_best = None
+        self.search_depth = depth
 
-        # 获取所有可能走法
-        moves = self.get_possible_moves()
-        if not moves:
-            return (7, 7)  # 默认中心点
+        # 上一回合（或上一轮迭代）的最佳走法优先搜索
+        key = self.position_key(True)
+        entry = self.transposition_table.probe(key)
+        first = self.pv_table.get(key) or (entry[4] if entry is not None else None)
+        if first in moves:
+            moves = [first] + [move for move in moves if move != first]
 
         # 遍历所有可能的走法
         for move in moves:
             # 模拟落子
-            self.game.board[move[0]][move[1]] = self.player
+            self.place_stone(move[0], move[1], self.player)
             # 评估局面
-            score = self.minimax(self.max_depth - 1, alpha, beta, False)
+            score = self.minimax(depth - 1, alpha, beta, False, move)
             # 撤销落子
-            self.game.board[move[0]][move[1]] = self.game.EMPTY
+            self.remove_stone(move[0], move[1], self.player)
 
             # 更新最佳走法
-            if self.debug_mode:
-                print(f"候选坐标 ({move[0]},{move[1]}) 评分 {score:.1f}")
+            if self.trace_hook is not None:
+                self.emit('root_move', move=move, score=score, depth=depth)
 
             if score > best_score:
                 best_score = score
                 best_move = move
-                if self.debug_mode:
-                    print(f"↑ 新最佳坐标 ({best_move[0]},{best_move[1]})")
+                self.root_best = (best_move, best_score)
             alpha = max(alpha, best_score)
 
-        if self.debug_mode:
-            print(f"[AI决策] 最终选择坐标 ({best_move[0]},{best_move[1]}) 评分 {best_score} (搜索深度 {self.max_depth})")
-        return best_move if best_move else moves[0]
+        if best_move is not None:
+            self.transposition_table.store(key, depth, EXACT, best_score, best_move)
+        return best_move, best_score
 
+    def principal_variation(self, max_length: int) -> List[Tuple[int, int]]:
+        """
+        沿置换表中的最佳走法还原主要变例，并记入pv_table供下一轮迭代排序使用
+        :return: 从根节点开始的走法序列
+        """
+        pv = []
+        placed = []
+        is_maximizing = True
+        while len(pv) < max_length:
+            key = self.position_key(is_maximizing)
+            entry = self.transposition_table.probe(key)
+            if entry is None or entry[4] is None or not self.board.is_empty(*entry[4]):
+                break
+            move = entry[4]
+            self.pv_table[key] = move
+            pv.append(move)
+            player = self.player if is_maximizing else self.opponent
+            self.place_stone(move[0], move[1], player)
+            placed.append((move, player))
+            if self.board.is_five_at(move[0], move[1], player):
+                break
+            is_maximizing = not is_maximizing
+        for move, player in reversed(placed):
+            self.remove_stone(move[0], move[1], player)
+        return pv
+
+    def iterative_deepening(self, moves: List[Tuple[int, int]]) -> Tuple[Tuple[int, int], float, int]:
+        """
+        迭代加深：深度从1开始逐层加深，直到用完时间/节点预算
+        每一轮的主要变例用于下一轮的走法排序
+        :return: (最深的完整一轮给出的最佳走法, 评分, 完成的深度)
+        """
+        best_move, best_score, completed = moves[0], -float('inf'), 0
+        max_depth = min(self.max_deepening_depth, 225 - self.board.count)
+        self.pv_table = {}
+        for depth in range(1, max_depth + 1):
+            start = time.perf_counter()
+            try:
+                move, score = self.search_root(moves, depth)
+            except SearchAborted:
+                # 中断时位棋盘处于搜索中途的状态，按根节点重新同步
+                self.load_board(self.root_board.copy())
+                if completed == 0 and self.root_best is not None:
+                    # 一轮都没完成时，退而使用本轮已经搜完的走法中的最佳
+                    best_move, best_score = self.root_best
+                break
+            best_move, best_score, completed = move, score, depth
+            pv = self.principal_variation(depth)
+            elapsed = time.perf_counter() - start
+            if self.stats is not None:
+                self.stats.depth_times.append((depth, elapsed, self.nodes))
+            if self.debug_mode or self.trace_hook is not None:
+                self.emit('depth', depth=depth, move=move, score=score, time=elapsed, nodes=self.nodes, pv=pv)
+            if abs(score) >= 1000000 - max_depth:
+                break  # 已找到必胜/必败，继续加深没有意义
+        return best_move, best_score, completed
+
+    def threat_search_root(self, moves: List[Tuple[int, int]]) -> Tuple[Optional[Tuple[int, int]], List[Tuple[int, int]]]:
+        """
+        根节点的威胁空间搜索
+        1.AI自己有VCF/VCT时直接返回必胜走法
+        2.对手有VCF/VCT时，只保留能化解的走法交给Minimax（都化解不了则不做限制）
+        3.所有调用共用threat_node_limit个节点；限时搜索时最多用掉剩余时间的threat_time_share
+        :return: (必胜走法或None, 需要继续搜索的根节点走法)
+        """
+        searcher = self.threat_searcher
+        deadline = None
+        if self.deadline is not None:
+            now = time.perf_counter()
+            deadline = now + (self.deadline - now) * self.threat_time_share
+        searcher.new_search(self.threat_node_limit, deadline)
+        searcher.cancel_event = self.cancel_event
+        win = searcher.find_win(self.board, self.player)
+        if win is not None:
+            self.emit('threat_win', move=win)
+            return win, moves
+
+        threat = searcher.find_win(self.board, self.opponent)
+        if threat is not None:
+            defenses = searcher.defenses(self.board, self.player, moves)
+            self.emit('threat_defense', threat=threat, defenses=defenses)
+            if defenses:
+                moves = defenses
+        return None, moves
+
+    def check_budget(self):
+        """超出时间或节点预算，或者搜索被取消时中断搜索"""
+        if self.node_limit is not None and self.nodes >= self.node_limit:
+            raise SearchAborted()
+        if self.nodes & 255 == 0:
+            # 并行搜索子进程中cancel_event是跨进程的multiprocessing.Event，每次查询都要加锁，与时间一样隔256个节点检查
+            if self.cancel_event is not None and self.cancel_event.is_set():
+                raise SearchAborted()
+            if self.deadline is not None and time.perf_counter() >= self.deadline:
+                raise SearchAborted()
+
+    def emit(self, event: str, **data):
+        """报告一个搜索事件：交给trace_hook，debug_mode时打印（根节点候选除外）"""
+        if self.trace_hook is not None:
+            self.trace_hook(event, data)
+        if self.debug_mode and event in DEBUG_EVENTS:
+            print(format_event(event, data))
+
+    def profile_move(self, path: Optional[str] = None, sort: str = 'cumulative', limit: int = 30) -> Tuple[Tuple[int, int], str]:
+        """
+        分析这一步：在cProfile下运行一次find_best_move
+        :param path: 给出时把报告写入该文件
+        :return: (最佳落子坐标, 文本报告)
+        """
+        return profile_call(self.find_best_move, sort, limit, path)
+
+    def close(self):
+        """释放并行搜索的进程池"""
+        if self.parallel_search is not None:
+            self.parallel_search.close()
+            self.parallel_search = None
 
+    def find_best_move(self, board: Optional[BitBoard] = None) -> Tuple[int, int]: # 元组类型，顺序+数量+类型固定
+        """
+        寻找最佳落子位置
+        设置了time_limit或node_limit时使用迭代加深，否则按max_depth固定深度搜索
+        :param board: 给出时搜索该局面（后台预想对手应对时使用），否则搜索self.game的当前局面
+        :return: (x, y) 最佳落子坐标
+        """
+        # 根节点：把棋盘转换为位棋盘，之后的搜索都在位棋盘上进行
+        if board is None:
+            self.sync_board()
+        else:
+            self.load_board(board)
+        self.root_board = self.board.copy()
+        self.nodes = 0
+        self.pv_table = {}
+        self.deadline = None
+        start = time.perf_counter()
+        stats = self.stats = SearchStats() if self.collect_stats or self.trace_hook is not None else None
+
+        # 开局库命中时直接落子
+        if self.use_opening_book and self.opening_book is not None:
+            book_move = self.opening_book.lookup(self.board, self.player)
+            if book_move is not None and self.board.is_empty(*book_move):
+                if stats is not None:
+                    stats.book_hit = True
+                    stats.move = book_move
+                    stats.time = time.perf_counter() - start
+                self.emit('book', move=book_move)
+                return book_move
+
+        if self.time_limit is not None:
+            self.deadline = time.perf_counter() + self.time_limit
+        if self.parallel_workers:
+            if self.parallel_search is None or self.parallel_search.workers != self.parallel_workers:
+                self.close()
+                self.parallel_search = ParallelRootSearch(self.parallel_workers)
+            self.parallel_search.new_search()
+
+        # 获取所有可能走法（按启发式排序，根节点不裁剪）
+        self.move_orderer.new_search()
+        moves = self.get_possible_moves(self.player)
+        if not moves:
+            return (7, 7)  # 默认中心点
 
+        # 先用威胁空间搜索处理双方的强制胜负
+        if self.use_threat_search:
+            threat_start = time.perf_counter()
+            win, moves = self.threat_search_root(moves)
+            if stats is not None:
+                stats.threat_time = time.perf_counter() - threat_start
+            if win is not None:
+                self.deadline = None
+                if stats is not None:
+                    stats.move = win
+                    stats.time = time.perf_counter() - start
+                return win
+
+        if self.time_limit is None and self.node_limit is None:
+            depth_start = time.perf_counter()
+            try:
+                best_move, best_score = self.search_root(moves, self.max_depth)
+            except SearchAborted:
+                # 只有取消会中断固定深度搜索，返回已搜完的走法中的最佳
+                self.load_board(self.root_board.copy())
+                best_move, best_score = self.root_best or (moves[0], -float('inf'))
+            depth = self.max_depth
+            if stats is not None:
+                stats.depth_times.append((depth, time.perf_counter() - depth_start, self.nodes))
+        else:
+            best_move, best_score, depth = self.iterative_deepening(moves)
+        self.deadline = None
+        best_move = best_move if best_move else moves[0]
+
+        if stats is not None:
+            stats.nodes = self.nodes
+            stats.move, stats.score, stats.depth = best_move, best_score, depth
+            stats.time = time.perf_counter() - start
+        if self.debug_mode or self.trace_hook is not None:
+            self.emit('result', move=best_move, score=best_score, depth=depth,
+                      tt=self.transposition_table.stats(), stats=stats)
+        return best_move
@@ -0,0 +1,152 @@
+import sys
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+from bitboard import BitBoard, BOARD_SIZE
+from transposition import ZOBRIST_KEYS
+
+'''
+后台AI计算：
+1.AIPlayer.find_best_move在单独的线程中运行，渲染主循环只需每帧轮询一次结果
+2.每次搜索有独立的取消事件，按R/Esc时立即中断，旧任务的结果会被丢弃
+3.搜索只读取开始时的棋盘（转换成位棋盘），不会与主线程的渲染冲突
+4.搜索是纯Python计算，会一直持有GIL；缩短GIL切换间隔，让渲染线程每帧都能及时拿到GIL
+5.后台思考（ponder）：轮到对手时，预先搜索对手最可能的几个应对（上一次搜索主要变例中的应对排在最前），
+  结果按落子后的局面哈希缓存；对手实际落子命中时立即给出走法，未命中时置换表也已经预热
+  后台思考有总时长预算，超出预算或对手落子时立即中断，中断的搜索结果不会被缓存
+'''
+
+SWITCH_INTERVAL = 0.001  # 秒，Python默认为0.005，默认值下主循环只能跑到45帧左右
+
+
+class AIWorker:
+    """
+    把AIPlayer的搜索放到后台线程，提供 start / poll / cancel 的轮询接口
+    """
+
+    def __init__(self, ai_player, ponder_budget: float = 10.0, ponder_replies: int = 3):
+        """
+        :param ponder_budget: 每个对手回合后台思考的总时长上限（秒）
+        :param ponder_replies: 后台思考的对手应对数
+        """
+        self.ai_player = ai_player
+        self.switch_interval = sys.getswitchinterval()  # 进程级设置，shutdown()时恢复
+        sys.setswitchinterval(SWITCH_INTERVAL)
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='ai-search')
+        self.future = None
+        self.cancel_event = None
+        self.ponder_budget = ponder_budget
+        self.ponder_replies = ponder_replies
+        self.ponder_future = None
+        self.ponder_event = None
+        self.ponder_results: Dict[int, Tuple[int, int]] = {}  # 对手应对后的局面哈希 -> AI的走法
+        self.ponder_hits = 0
+        self.ponder_misses = 0
+
+    def _search(self, cancel_event: threading.Event) -> Optional[Tuple[int, int]]:
+        # 任务在单线程执行器中串行运行，这里设置取消事件不会影响其他任务
+        self.ai_player.cancel_event = cancel_event
+        try:
+            return self.ai_player.find_best_move()
+        finally:
+            self.ai_player.cancel_event = None
+
+    def start(self):
+        """开始一次后台搜索（上一次未完成的搜索会被取消）；后台思考已算出当前局面时直接给出结果"""
+        game = self.ai_player.game
+        move = self.ponder_results.get(game.hash)
+        pondered = self.ponder_future is not None
+        self.cancel()
+        self.ponder_results = {}
+        if move is not None and game.is_valid_move(*move):
+            self.ponder_hits += 1
+            self.future = Future()
+            self.future.set_result(move)
+            return
+        if pondered:
+            self.ponder_misses += 1
+        self.cancel_event = threading.Event()
+        self.future = self.executor.submit(self._search, self.cancel_event)
+
+    def is_thinking(self) -> bool:
+        return self.future is not None
+
+    def poll(self) -> Optional[Tuple[int, int]]:
+        """
+        非阻塞地查询结果
+        :return: 搜索完成时返回落子坐标，否则返回None
+        """
+        if self.future is None or not self.future.done():
+            return None
+        future, self.future = self.future, None
+        return future.result()
+
+    def ponder(self):
+        """
+        轮到对手时调用：在后台预先搜索对手可能的应对
+        棋盘在主线程拷贝，之后对手落子不会影响后台搜索
+        """
+        self.cancel()
+        self.ponder_results = {}
+        game = self.ai_player.game
+        if game.game_over or not self.ponder_replies or self.ponder_budget <= 0:
+            return
+        self.ponder_event = threading.Event()
+        self.ponder_future = self.executor.submit(self._ponder, game.bitboard.copy(), game.hash,
+                                                  game.current_player, self.ponder_event, self.ponder_results)
+
+    def predicted_replies(self, board: BitBoard, board_hash: int, opponent: int) -> List[Tuple[int, int]]:
+        """对手最可能的应对：上一次搜索的主要变例（置换表中该局面的最佳走法）优先，其余按走法排序"""
+        ai = self.ai_player
+        ai.load_board(board.copy())
+        moves = ai.get_possible_moves(opponent)
+        entry = ai.transposition_table.probe(board_hash)  # 轮到对手时置换表键不含轮次
+        if entry is not None and entry[4] in moves:
+            moves.remove(entry[4])
+            moves.insert(0, entry[4])
+        return moves[:self.ponder_replies]
+
+    def _ponder(self, board: BitBoard, board_hash: int, opponent: int, ponder_event: threading.Event,
+                results: Dict[int, Tuple[int, int]]):
+        ai = self.ai_player
+        # 超出预算时由计时器中断搜索
+        timer = threading.Timer(self.ponder_budget, ponder_event.set)
+        timer.daemon = True
+        timer.start()
+        ai.cancel_event = ponder_event
+        debug_mode, ai.debug_mode = ai.debug_mode, False  # 人类思考时不打印后台搜索的过程
+        try:
+            for row, col in self.predicted_replies(board, board_hash, opponent):
+                if ponder_event.is_set():
+                    break
+                child = board.copy()
+                child.place(row, col, opponent)
+                if child.is_five_at(row, col, opponent):
+                    continue
+                move = ai.find_best_move(child)
+                if ponder_event.is_set():
+                    break  # 中途被中断，结果只是部分搜索
+                results[board_hash ^ ZOBRIST_KEYS[opponent - 1][row * BOARD_SIZE + col]] = move
+        finally:
+            timer.cancel()
+            ai.cancel_event = None
+            ai.debug_mode = debug_mode
+
+    def is_pondering(self) -> bool:
+        return self.ponder_future is not None and not self.ponder_future.done()
+
+    def cancel(self):
+        """取消正在进行的搜索和后台思考，其结果不会再被poll返回"""
+        if self.cancel_event is not None:
+            self.cancel_event.set()
+        if self.ponder_event is not None:
+            self.ponder_event.set()
+        self.future = None
+        self.cancel_event = None
+        self.ponder_future = None
+        self.ponder_event = None
+
+    def shutdown(self):
+        self.cancel()
+        self.executor.shutdown(wait=False)
+        sys.setswitchinterval(self.switch_interval)
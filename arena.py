@@ -0,0 +1,196 @@
+import argparse
+import ast
+import math
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+from game_core import GomokuGame
+
+'''
+自对弈竞技场：
+1.两套AIPlayer参数（max_depth、expand_radius、pattern_scores等）在进程池中无界面对弈N局
+2.每个随机开局下两局并交换先后手，抵消先手优势；引擎是确定性的，不加随机开局时只会重复两盘棋
+  开局按种子生成，并按8种对称去重，保证各对棋的开局互不相同
+  默认关闭开局库（否则双方开局都由开局库给出，比较不出参数在开局阶段的差别），参数中写use_opening_book=True时才使用
+3.统计胜率、Elo差（含95%置信区间）、每步平均耗时和每秒节点数（Minimax节点，耗时包含威胁空间搜索）
+4.用法：python arena.py --games 40 --a max_depth=3 --b max_depth=2
+'''
+
+Z_95 = 1.96
+
+
+def random_opening(rng: random.Random, plies: int, radius: int = 2) -> List[Tuple[int, int]]:
+    """在棋盘中心附近随机落plies个子（黑白交替）"""
+    center = GomokuGame.BOARD_SIZE // 2
+    cells = [(r, c) for r in range(center - radius, center + radius + 1)
+             for c in range(center - radius, center + radius + 1)]
+    return rng.sample(cells, plies)
+
+
+def random_openings(rng: random.Random, count: int, plies: int, radius: int = 2) -> List[List[Tuple[int, int]]]:
+    """
+    生成count个在8种对称下互不相同的随机开局（可选的开局不够时允许重复）
+    """
+    from bitboard import BitBoard
+    from opening_book import canonical_key
+    openings, seen = [], set()
+    for _ in range(count * 20):
+        if len(openings) >= count:
+            break
+        opening = random_opening(rng, plies, radius)
+        board = BitBoard()
+        for i, (row, col) in enumerate(opening):
+            board.place(row, col, GomokuGame.BLACK if i % 2 == 0 else GomokuGame.WHITE)
+        key = canonical_key(board, GomokuGame.BLACK if plies % 2 == 0 else GomokuGame.WHITE)[0]
+        if key not in seen:
+            seen.add(key)
+            openings.append(opening)
+    while len(openings) < count:
+        openings.append(random_opening(rng, plies, radius))
+    return openings
+
+
+def play_game(config_a: Dict, config_b: Dict, a_is_black: bool, opening: List[Tuple[int, int]],
+              max_moves: Optional[int] = None) -> Dict:
+    """
+    下一局棋
+    :param a_is_black: A方是否执黑
+    :param opening: 开局的若干步（不计入双方的耗时统计）
+    :return: 胜方（'a'/'b'/None）、总步数以及双方的耗时和节点数
+    """
+    from ai_player import AIPlayer
+
+    game = GomokuGame()
+    for row, col in opening:
+        game.make_move(row, col)
+    sides = {}
+    for name, config, color in (('a', config_a, game.BLACK if a_is_black else game.WHITE),
+                                ('b', config_b, game.WHITE if a_is_black else game.BLACK)):
+        ai = AIPlayer(game, color, debug_mode=False)
+        ai.use_opening_book = False  # 开局库只在参数明确打开时使用
+        for key, value in config.items():
+            setattr(ai, key, value)
+        sides[color] = (name, ai)
+
+    stats = {name: {'moves': 0, 'time': 0.0, 'nodes': 0} for name in ('a', 'b')}
+    winner = None
+    while not game.game_over and (max_moves is None or len(game.move_history) < max_moves):
+        name, ai = sides[game.current_player]
+        start = time.perf_counter()
+        move = ai.find_best_move()
+        stats[name]['time'] += time.perf_counter() - start
+        stats[name]['moves'] += 1
+        stats[name]['nodes'] += ai.nodes
+        if not game.make_move(*move):
+            winner = 'b' if name == 'a' else 'a'  # 非法落子判负
+            break
+    for _, ai in sides.values():
+        ai.close()
+    if game.winner is not None:
+        winner = sides[game.winner][0]
+    return {'winner': winner, 'a_is_black': a_is_black, 'length': len(game.move_history), 'stats': stats}
+
+
+def _play_game_task(args):
+    return play_game(*args)
+
+
+def elo_from_score(score: float) -> float:
+    """得分率 -> Elo差"""
+    score = min(max(score, 1e-6), 1 - 1e-6)
+    return 400 * math.log10(score / (1 - score))
+
+
+def summarize(results: List[Dict]) -> Dict:
+    """汇总对局结果：A方的胜/负/和、得分率、Elo差与置信区间，以及双方的耗时和速度"""
+    n = len(results)
+    wins = sum(1 for r in results if r['winner'] == 'a')
+    losses = sum(1 for r in results if r['winner'] == 'b')
+    draws = n - wins - losses
+    score = (wins + 0.5 * draws) / n if n else 0.5
+    # 每局得分的标准差估计得分率的标准误
+    variance = (wins * (1 - score) ** 2 + losses * score ** 2 + draws * (0.5 - score) ** 2) / n if n else 0.0
+    margin = Z_95 * math.sqrt(variance / n) if n else 0.0
+
+    report = {
+        'games': n,
+        'a_wins': wins,
+        'b_wins': losses,
+        'draws': draws,
+        'a_black_wins': sum(1 for r in results if r['winner'] == 'a' and r['a_is_black']),
+        'a_white_wins': sum(1 for r in results if r['winner'] == 'a' and not r['a_is_black']),
+        'a_score': score,
+        'elo': elo_from_score(score),
+        'elo_low': elo_from_score(score - margin),
+        'elo_high': elo_from_score(score + margin),
+        'average_length': sum(r['length'] for r in results) / n if n else 0.0,
+    }
+    for name in ('a', 'b'):
+        moves = sum(r['stats'][name]['moves'] for r in results)
+        total_time = sum(r['stats'][name]['time'] for r in results)
+        nodes = sum(r['stats'][name]['nodes'] for r in results)
+        report[f'{name}_latency'] = total_time / moves if moves else 0.0
+        report[f'{name}_nps'] = nodes / total_time if total_time else 0.0
+    return report
+
+
+def run_match(config_a: Dict, config_b: Dict, games: int = 20, workers: Optional[int] = None,
+              opening_plies: int = 4, seed: int = 0, max_moves: Optional[int] = None) -> Dict:
+    """
+    在进程池中对弈games局（按开局成对安排，A方先后手交替）
+    :param workers: 进程数，默认为CPU核数；为1时在本进程中运行
+    :param opening_plies: 每局开始前随机落子的步数
+    :param seed: 随机开局的种子，相同种子得到相同的开局序列
+    """
+    openings = random_openings(random.Random(seed), (games + 1) // 2, opening_plies)
+    tasks = [(config_a, config_b, i % 2 == 0, openings[i // 2], max_moves) for i in range(games)]
+
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        results = [_play_game_task(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(_play_game_task, tasks))
+    return summarize(results)
+
+
+def format_report(report: Dict) -> str:
+    return '\n'.join([
+        f"对局数: {report['games']}  平均步数: {report['average_length']:.1f}",
+        f"A胜 {report['a_wins']}（执黑 {report['a_black_wins']} / 执白 {report['a_white_wins']}）"
+        f"  B胜 {report['b_wins']}  和棋 {report['draws']}",
+        f"A得分率: {report['a_score']:.3f}  Elo差: {report['elo']:+.0f}"
+        f"（95%置信区间 {report['elo_low']:+.0f} ~ {report['elo_high']:+.0f}）",
+        f"A: 每步 {report['a_latency'] * 1000:.1f} ms, {report['a_nps']:.0f} 节点/秒",
+        f"B: 每步 {report['b_latency'] * 1000:.1f} ms, {report['b_nps']:.0f} 节点/秒",
+    ])
+
+
+def parse_config(items: List[str]) -> Dict:
+    """把 key=value 形式的参数解析为AIPlayer属性字典（value按Python字面量解析）"""
+    config = {}
+    for item in items:
+        key, _, value = item.partition('=')
+        try:
+            config[key] = ast.literal_eval(value)
+        except (ValueError, SyntaxError):
+            config[key] = value
+    return config
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="AIPlayer参数自对弈")
+    parser.add_argument('--a', nargs='*', default=[], help="A方参数，如 max_depth=3 expand_radius=1")
+    parser.add_argument('--b', nargs='*', default=[], help="B方参数")
+    parser.add_argument('--games', type=int, default=20, help="对局数")
+    parser.add_argument('--workers', type=int, default=None, help="进程数（默认CPU核数）")
+    parser.add_argument('--opening-plies', type=int, default=4, help="随机开局步数")
+    parser.add_argument('--seed', type=int, default=0, help="随机开局种子")
+    parser.add_argument('--max-moves', type=int, default=None, help="超过该步数判和")
+    args = parser.parse_args()
+
+    result = run_match(parse_config(args.a), parse_config(args.b), args.games, args.workers,
+                       args.opening_plies, args.seed, args.max_moves)
+    print(format_report(result))
@@ -10,6 +10,12 @@ class AudioManager:
         self.background_music = None
         self.sound_enabled = True
         self.music_enabled = True
+
+    def subscribe(self, game):
+        """Play move/win sounds and restart the music on the game's events"""
+        game.add_listener(game.MOVE_EVENT, lambda row, col, player: self.play_sound('piece'))
+        game.add_listener(game.WIN_EVENT, lambda winner: self.play_sound('win'))
+        game.add_listener(game.RESET_EVENT, self.play_background_music)
         
     def load_sound(self, name, file_path):
         """Load a sound effect file"""
@@ -0,0 +1,119 @@
+import argparse
+import time
+from typing import Dict, List, Optional
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from bitboard import BLACK, WHITE
+
+'''
+批量局面评估（Numpy向量化）：
+1.输入(N, 15, 15)的棋盘数组，一次算出N个局面的评分，结果与AIPlayer.evaluate_position相同
+2.用sliding_window_view取出四个方向的所有五元组，按三进制编码（第k格的值乘3^k）得到0~242的整数
+3.以编码为下标查一张243项的评分表：只有黑子查黑棋表，只有白子查白棋表，双方都有为0
+  有六格棋型时同样对六格窗口编码（729项）查表累加
+4.按块处理，内存占用与N无关；可用于搜索中的叶子批量评估，也可以给Dataset中的大量局面打分
+'''
+
+CHUNK = 4096  # 每块处理的局面数
+
+
+def _masks(code: int, size: int):
+    """三进制编码 -> (黑棋掩码, 白棋掩码)"""
+    black = white = 0
+    for k in range(size):
+        digit = code % 3
+        code //= 3
+        if digit == BLACK:
+            black |= 1 << k
+        elif digit == WHITE:
+            white |= 1 << k
+    return black, white
+
+
+def window_table(black_table: List[int], white_table: List[int],
+                 six_table: Optional[List[int]] = None) -> Dict[int, np.ndarray]:
+    """
+    由整数下标评分表（pattern_tables.py）构造三进制编码评分表
+    :return: 窗口长度 -> 以三进制编码为下标的评分数组（5格243项，有六格棋型时另有6格729项）
+    """
+    five = np.zeros(3 ** 5, dtype=np.int64)
+    for code in range(len(five)):
+        black, white = _masks(code, 5)
+        if not white:
+            five[code] = black_table[black]
+        elif not black:
+            five[code] = white_table[white]
+    tables = {5: five}
+    if six_table is not None:
+        tables[6] = np.array([six_table[black | (white << 6)]
+                              for black, white in (_masks(code, 6) for code in range(3 ** 6))], dtype=np.int64)
+    return tables
+
+
+def window_codes(boards: np.ndarray, size: int = 5) -> List[np.ndarray]:
+    """
+    四个方向上所有长度为size的窗口的三进制编码（第k格的值乘3^k，k沿方向递增，与棋型字符串的读取顺序一致）
+    :param boards: (N, 15, 15)，取值EMPTY/BLACK/WHITE
+    :return: [水平, 垂直, 主对角线, 反对角线]，五格时形状为(N,15,11)、(N,11,15)、(N,11,11)、(N,11,11)
+    """
+    boards = np.asarray(boards, dtype=np.int32)
+    powers = 3 ** np.arange(size)
+    horizontal = sliding_window_view(boards, size, axis=2) @ powers
+    vertical = sliding_window_view(boards, size, axis=1) @ powers
+    # 方块取主对角线即(r+k, c+k)；左右翻转后取对角线即(r+k, c+size-1-k)，沿行号递增
+    blocks = sliding_window_view(boards, (size, size), axis=(1, 2))
+    diagonal = np.diagonal(blocks, axis1=-2, axis2=-1) @ powers
+    anti_diagonal = np.diagonal(blocks[..., ::-1], axis1=-2, axis2=-1) @ powers
+    return [horizontal, vertical, diagonal, anti_diagonal]
+
+
+def batch_evaluate(boards: np.ndarray, tables: Dict[int, np.ndarray], player: Optional[int] = None,
+                   chunk: int = CHUNK) -> np.ndarray:
+    """
+    批量评估
+    :param boards: (N, 15, 15)或单个(15, 15)棋盘
+    :param tables: window_table()的结果
+    :param player: 给出时按该方视角（白棋取反，与evaluate_position一致），否则返回原始总分
+    :return: (N,)的评分
+    """
+    boards = np.asarray(boards)
+    if boards.ndim == 2:
+        boards = boards[np.newaxis]
+    scores = np.empty(len(boards), dtype=np.int64)
+    for start in range(0, len(boards), chunk):
+        part = boards[start:start + chunk]
+        total = np.zeros(len(part), dtype=np.int64)
+        for size, table in tables.items():
+            for codes in window_codes(part, size):
+                total += table[codes].reshape(len(part), -1).sum(axis=1)
+        scores[start:start + chunk] = total
+    if player == WHITE:
+        scores = -scores
+    return scores
+
+
+def dataset_boards(x: np.ndarray) -> np.ndarray:
+    """
+    Dataset中的棋盘（先手为1，后手为0.5，空为0）转换为EMPTY/BLACK/WHITE
+    """
+    boards = np.zeros(x.shape, dtype=np.int8)
+    boards[x == 1] = BLACK
+    boards[x == 0.5] = WHITE
+    return boards
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="批量评估数据集中的局面")
+    parser.add_argument('path', nargs='?', default='Dataset/x_test.npz', help="npz文件（arr_0为(N,15,15)）")
+    args = parser.parse_args()
+
+    from ai_player import AIPlayer
+    from game_core import GomokuGame
+    from pattern_tables import pattern_tables
+    tables = pattern_tables(AIPlayer(GomokuGame(), BLACK, debug_mode=False).pattern_scores)
+    data = dataset_boards(np.load(args.path)['arr_0'])
+    start = time.perf_counter()
+    result = batch_evaluate(data, window_table(*tables))
+    elapsed = time.perf_counter() - start
+    print(f"{len(data)} 个局面，耗时 {elapsed:.2f}s（{len(data) / elapsed:.0f} 局面/秒）")
+    print(f"评分：最小 {result.min()} 中位数 {int(np.median(result))} 最大 {result.max()}")
@@ -0,0 +1,151 @@
+import argparse
+import json
+import random
+import sys
+import time
+import timeit
+import tracemalloc
+from typing import Dict, List, Optional, Tuple
+from game_core import GomokuGame
+
+'''
+AI性能基准：
+1.固定的测试局面（开局、中局、战术（有VCF）、接近满盘），每个局面按固定深度运行
+  find_best_move、evaluate_position、get_possible_moves、check_winner
+  只测Minimax搜索本身：关闭开局库和威胁空间搜索，每个局面都必须真正进入Minimax（节点数>0）
+2.报告节点数、每秒节点数、耗时、峰值内存（tracemalloc单独跑一遍，不影响计时）以及选择的走法
+3.--json输出机器可读的结果，便于对比不同提交；--check在走法与记录的结果不一致时返回非零
+4.用法：python benchmark.py --check --json bench.json
+'''
+
+MIDGAME = [(7, 7), (6, 8), (7, 6), (7, 5), (8, 7), (9, 7), (6, 7), (5, 7), (7, 8), (7, 9),
+           (4, 6), (5, 6), (8, 5), (9, 4), (8, 6), (8, 4), (8, 9), (8, 8)]
+
+
+def near_full_moves(stones: int = 200, seed: int = 2024) -> List[Tuple[int, int]]:
+    """按固定种子随机填充棋盘，跳过会形成五连的落子，得到一个接近满盘且未分胜负的局面"""
+    rng = random.Random(seed)
+    cells = [(r, c) for r in range(GomokuGame.BOARD_SIZE) for c in range(GomokuGame.BOARD_SIZE)]
+    rng.shuffle(cells)
+    game = GomokuGame()
+    moves = []
+    for row, col in cells:
+        if len(moves) >= stones:
+            break
+        game.push_move(row, col)
+        if game.game_over:
+            game.pop_move()
+            continue
+        moves.append((row, col))
+    return moves
+
+
+# 名称 -> (开局走法, 搜索深度, 期望的走法)
+# 期望走法是当前引擎在固定深度下（不做威胁搜索）的选择；纯性能优化不应改变它，评估函数有意修改时需要重新记录
+POSITIONS = {
+    'opening': ([(7, 7), (6, 8), (8, 8)], 3, (9, 9)),
+    'midgame': (MIDGAME, 3, (9, 6)),
+    'tactical': (MIDGAME + [(9, 10), (10, 11), (5, 8), (4, 9), (9, 6)], 3, (10, 6)),
+    'near_full': (near_full_moves(), 3, (8, 4)),
+}
+
+MICRO_NUMBER = 2000  # 每个小函数的调用次数
+
+
+def setup(moves: List[Tuple[int, int]], depth: int):
+    """构造局面以及轮到落子一方的AI（关闭开局库、威胁空间搜索和调试输出）"""
+    from ai_player import AIPlayer
+    game = GomokuGame()
+    for row, col in moves:
+        game.make_move(row, col)
+    ai = AIPlayer(game, game.current_player, debug_mode=False)
+    ai.use_opening_book = False
+    ai.use_threat_search = False  # 威胁搜索会直接给出战术局面的走法，Minimax不再运行
+    ai.max_depth = depth
+    return game, ai
+
+
+def bench_position(name: str, moves: List[Tuple[int, int]], depth: int, expected: Optional[Tuple[int, int]]) -> Dict:
+    """对一个局面跑全部基准项"""
+    game, ai = setup(moves, depth)
+
+    # find_best_move：从空置换表开始，只计时
+    start = time.perf_counter()
+    move = ai.find_best_move()
+    elapsed = time.perf_counter() - start
+    nodes = ai.nodes
+    if nodes == 0:
+        raise RuntimeError(f"局面{name}没有进入Minimax搜索，节点数和每秒节点数没有意义")
+
+    # 峰值内存：新建AI再跑一遍（tracemalloc会明显拖慢执行，不与计时混在一起）
+    _, traced = setup(moves, depth)
+    tracemalloc.start()
+    traced.find_best_move()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    # 小函数：在根局面上单独调用前先同步位棋盘
+    ai.sync_board()
+    micro = {}
+    for label, func in (('evaluate_position', ai.evaluate_position),
+                        ('get_possible_moves', lambda: ai.get_possible_moves(ai.player)),
+                        ('check_winner', ai.check_winner)):
+        micro[label] = timeit.timeit(func, number=MICRO_NUMBER) / MICRO_NUMBER * 1e6
+    ai.close()
+
+    return {
+        'name': name,
+        'stones': len(moves),
+        'depth': depth,
+        'move': list(move),
+        'expected': list(expected) if expected is not None else None,
+        'move_ok': expected is None or tuple(move) == tuple(expected),
+        'nodes': nodes,
+        'time': elapsed,
+        'nps': nodes / elapsed if elapsed else 0.0,
+        'peak_memory': peak,
+        'micro_us': micro,
+    }
+
+
+def run_benchmarks(names: Optional[List[str]] = None) -> List[Dict]:
+    results = []
+    for name in names or POSITIONS:
+        moves, depth, expected = POSITIONS[name]
+        results.append(bench_position(name, moves, depth, expected))
+    return results
+
+
+def format_results(results: List[Dict]) -> str:
+    lines = [f"{'局面':<10}{'走法':>10}{'节点':>9}{'耗时(s)':>10}{'节点/秒':>10}{'峰值内存(KB)':>14}"
+             f"{'评估(us)':>10}{'走法生成(us)':>14}{'胜负(us)':>10}"]
+    for r in results:
+        move = f"({r['move'][0]},{r['move'][1]})" + ('' if r['move_ok'] else '!')
+        micro = r['micro_us']
+        lines.append(f"{r['name']:<10}{move:>10}{r['nodes']:>9}{r['time']:>10.3f}{r['nps']:>10.0f}"
+                     f"{r['peak_memory'] / 1024:>14.0f}{micro['evaluate_position']:>10.1f}"
+                     f"{micro['get_possible_moves']:>14.1f}{micro['check_winner']:>10.1f}")
+    return '\n'.join(lines)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="AI性能基准")
+    parser.add_argument('positions', nargs='*', help=f"要运行的局面（默认全部：{', '.join(POSITIONS)}）")
+    parser.add_argument('--json', help="把结果写入JSON文件（'-'为标准输出）")
+    parser.add_argument('--check', action='store_true', help="走法与记录不一致时返回非零")
+    args = parser.parse_args()
+
+    results = run_benchmarks(args.positions)
+    if args.json == '-':
+        print(json.dumps(results, indent=2))
+    else:
+        print(format_results(results))
+        if args.json:
+            with open(args.json, 'w') as f:
+                json.dump(results, f, indent=2)
+
+    changed = [r['name'] for r in results if not r['move_ok']]
+    if changed:
+        print(f"固定深度下走法发生变化: {', '.join(changed)}", file=sys.stderr)
+        if args.check:
+            sys.exit(1)
@@ -0,0 +1,208 @@
+import numpy as np
+from typing import List, Optional, Tuple
+
+'''
+位棋盘（Bitboard）：
+1.黑白双方各用一组Python整数存储棋子，搜索时不再逐格访问Numpy数组
+2.按行、列、主对角线、反对角线四个方向分别维护每条线的位掩码，五连和棋型判断都变成移位+与运算
+3.另外维护整盘的占用掩码（每行16位，第16位作为哨兵），用于快速生成落子候选
+4.只在搜索根节点与GomokuGame.board互相转换
+'''
+
+BOARD_SIZE = 15
+EMPTY = 0
+BLACK = 1
+WHITE = 2
+
+# 整盘掩码每行占16位，最后一位恒为0，左右移位时不会跨行串位
+ROW_STRIDE = BOARD_SIZE + 1
+BOARD_MASK = 0
+for _r in range(BOARD_SIZE):
+    BOARD_MASK |= ((1 << BOARD_SIZE) - 1) << (_r * ROW_STRIDE)
+
+# 整盘掩码的字节数（序列化用）
+STONE_BYTES = (BOARD_SIZE * ROW_STRIDE + 7) // 8
+
+# 整盘掩码上四个方向的移位步长：水平、垂直、主对角线、反对角线
+MASK_STEPS = (1, ROW_STRIDE, ROW_STRIDE + 1, ROW_STRIDE - 1)
+
+LINE_COUNTS = (BOARD_SIZE, BOARD_SIZE, 2 * BOARD_SIZE - 1, 2 * BOARD_SIZE - 1)
+
+
+def cell_lines(row: int, col: int) -> Tuple[Tuple[int, int], ...]:
+    """
+    计算一个格子在四个方向上所在的线编号和位序号
+    位序号沿方向向量递增，与原字符串棋型的读取顺序一致
+    :return: ((线编号, 位序号), ...) 共四项
+    """
+    return (
+        (row, col),                           # 水平：第row行，第col位
+        (col, row),                           # 垂直：第col列，第row位
+        (row - col + BOARD_SIZE - 1, row),    # 主对角线：row-col为常数
+        (row + col, row),                     # 反对角线：row+col为常数
+    )
+
+
+# 预计算：每个格子对应的(方向, 线编号, 位)
+CELL_LINES = [cell_lines(r, c) for r in range(BOARD_SIZE) for c in range(BOARD_SIZE)]
+
+# 预计算：每条线上真实存在的格子的位掩码
+LINE_MASKS = [[0] * n for n in LINE_COUNTS]
+for _r in range(BOARD_SIZE):
+    for _c in range(BOARD_SIZE):
+        for _d, (_idx, _bit) in enumerate(cell_lines(_r, _c)):
+            LINE_MASKS[_d][_idx] |= 1 << _bit
+
+# 预计算：每条线上所有完整五元组的起始位
+LINE_WINDOWS = [
+    [[s for s in range(BOARD_SIZE - 4) if (mask >> s) & 0b11111 == 0b11111] for mask in masks]
+    for masks in LINE_MASKS
+]
+
+
+def has_five(bits: int) -> bool:
+    """判断一条线的位掩码中是否存在连续五位"""
+    return bool(bits & (bits >> 1) & (bits >> 2) & (bits >> 3) & (bits >> 4))
+
+
+def mask_has_five(bits: int) -> bool:
+    """
+    判断整盘掩码中是否存在任意方向的五连
+    哨兵位恒为0，水平/对角线方向的移位不会跨行拼出假五连
+    """
+    for step in MASK_STEPS:
+        pairs = bits & (bits >> step)
+        fours = pairs & (pairs >> (2 * step))
+        if fours & (bits >> (4 * step)):
+            return True
+    return False
+
+
+def dilate(bits: int, radius: int = 1) -> int:
+    """
+    将整盘掩码向八个方向扩张radius格（切比雪夫距离）
+    每行的哨兵位保证水平移位不会跨行
+    """
+    for _ in range(radius):
+        horizontal = bits | ((bits << 1) & BOARD_MASK) | (bits >> 1)
+        bits = horizontal | ((horizontal << ROW_STRIDE) & BOARD_MASK) | (horizontal >> ROW_STRIDE)
+        bits &= BOARD_MASK
+    return bits
+
+
+def iter_positions(bits: int):
+    """按行优先顺序遍历整盘掩码中的所有置位格子，产出(row, col)"""
+    while bits:
+        low = bits & -bits
+        pos = low.bit_length() - 1
+        yield divmod(pos, ROW_STRIDE)
+        bits ^= low
+
+
+class BitBoard:
+    """
+    五子棋位棋盘
+    lines[p][d][i]：玩家p（0黑1白）在方向d第i条线上的棋子位掩码
+    stones[p]：玩家p的整盘掩码，occupied：双方合计
+    """
+
+    def __init__(self):
+        self.lines = [[[0] * n for n in LINE_COUNTS] for _ in range(2)]
+        self.stones = [0, 0]
+        self.occupied = 0
+        self.count = 0
+
+    @classmethod
+    def from_array(cls, board) -> 'BitBoard':
+        """由GomokuGame.board（15x15数组）构造位棋盘"""
+        bitboard = cls()
+        for r, row in enumerate(np.asarray(board).tolist()):
+            for c, cell in enumerate(row):
+                if cell != EMPTY:
+                    bitboard.place(r, c, cell)
+        return bitboard
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> 'BitBoard':
+        """由to_bytes()的结果还原位棋盘（跨进程传输用）"""
+        bitboard = cls()
+        for p, player in enumerate((BLACK, WHITE)):
+            stones = int.from_bytes(data[p * STONE_BYTES:(p + 1) * STONE_BYTES], 'little')
+            for r, c in iter_positions(stones):
+                bitboard.place(r, c, player)
+        return bitboard
+
+    def to_bytes(self) -> bytes:
+        """紧凑编码：黑白双方的整盘掩码各STONE_BYTES字节"""
+        return b''.join(stones.to_bytes(STONE_BYTES, 'little') for stones in self.stones)
+
+    def to_array(self) -> np.ndarray:
+        """转换回与GomokuGame.board相同格式的Numpy数组"""
+        board = np.zeros((BOARD_SIZE, BOARD_SIZE), dtype=int)
+        for p, player in enumerate((BLACK, WHITE)):
+            for r, c in iter_positions(self.stones[p]):
+                board[r][c] = player
+        return board
+
+    def copy(self) -> 'BitBoard':
+        other = BitBoard.__new__(BitBoard)
+        other.lines = [[list(line) for line in per_player] for per_player in self.lines]
+        other.stones = list(self.stones)
+        other.occupied = self.occupied
+        other.count = self.count
+        return other
+
+    def place(self, row: int, col: int, player: int):
+        """落子（调用方保证该位置为空）"""
+        lines = self.lines[player - 1]
+        for d, (idx, bit) in enumerate(CELL_LINES[row * BOARD_SIZE + col]):
+            lines[d][idx] |= 1 << bit
+        pos_bit = 1 << (row * ROW_STRIDE + col)
+        self.stones[player - 1] |= pos_bit
+        self.occupied |= pos_bit
+        self.count += 1
+
+    def remove(self, row: int, col: int, player: int):
+        """撤销落子（调用方保证该位置为player的棋子）"""
+        lines = self.lines[player - 1]
+        for d, (idx, bit) in enumerate(CELL_LINES[row * BOARD_SIZE + col]):
+            lines[d][idx] &= ~(1 << bit)
+        pos_bit = 1 << (row * ROW_STRIDE + col)
+        self.stones[player - 1] &= ~pos_bit
+        self.occupied &= ~pos_bit
+        self.count -= 1
+
+    def get(self, row: int, col: int) -> int:
+        """返回格子上的棋子（EMPTY/BLACK/WHITE）"""
+        pos = row * ROW_STRIDE + col
+        if (self.stones[0] >> pos) & 1:
+            return BLACK
+        if (self.stones[1] >> pos) & 1:
+            return WHITE
+        return EMPTY
+
+    def is_empty(self, row: int, col: int) -> bool:
+        return not (self.occupied >> (row * ROW_STRIDE + col)) & 1
+
+    def is_full(self) -> bool:
+        return self.count == BOARD_SIZE * BOARD_SIZE
+
+    def is_five_at(self, row: int, col: int, player: int) -> bool:
+        """只检查经过(row, col)的四条线，判断player是否五连"""
+        lines = self.lines[player - 1]
+        for d, (idx, _) in enumerate(CELL_LINES[row * BOARD_SIZE + col]):
+            if has_five(lines[d][idx]):
+                return True
+        return False
+
+    def winner(self) -> Optional[int]:
+        """全盘检查是否有五连，返回获胜方或None"""
+        for p, player in enumerate((BLACK, WHITE)):
+            if mask_has_five(self.stones[p]):
+                return player
+        return None
+
+    def neighbor_moves(self, radius: int = 1) -> List[Tuple[int, int]]:
+        """已有棋子radius范围内的所有空位，按行优先顺序返回"""
+        candidates = dilate(self.occupied, radius) & ~self.occupied
+        return list(iter_positions(candidates))
@@ -0,0 +1,268 @@
+import argparse
+import asyncio
+import itertools
+import os
+import socket
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Optional, Tuple
+from bitboard import BitBoard, BLACK, WHITE, BOARD_SIZE
+from protocol import FrameDecoder, ProtocolError, encode, recv_messages
+
+'''
+无界面的AI引擎服务（AI即服务）：
+1.通过本地TCP或Unix套接字接收局面，消息格式与联机对战相同（protocol.py分帧）
+  请求：{'type': 'search', 'id': 请求编号, 'moves': [[row, col], ...]（或'board': 15x15数组）,
+         'player': 执子方（可省略，按棋子数推断）, 'deadline': 秒（可省略）, 'depth': 最大深度（可省略）}
+  回复：{'type': 'result', 'id', 'move', 'depth', 'nodes', 'time'} 或 {'type': 'error', 'id', 'reason'}
+2.请求排队后交给进程池搜索，每个子进程常驻黑白两个AIPlayer（置换表在请求之间保留）
+3.每个请求有独立的截止时间：排队超时的请求不再搜索，搜索本身（威胁搜索+迭代加深）按剩余时间停止，
+  到截止时间仍没有结果时立即回复deadline；给出depth时迭代加深到该深度为止，同样受截止时间约束
+4.排队的请求超过上限时直接回复busy，调用方可以换一个引擎或稍后重试
+5.同一个连接可以连续发送多个请求，回复按完成顺序返回，用id对应
+'''
+
+DEFAULT_DEADLINE = 5.0  # 秒，请求未给出deadline时使用
+MAX_DEPTH = 20  # 请求未给出depth时迭代加深的最大深度（与AIPlayer.max_deepening_depth的默认值相同）
+MARGIN = 0.05  # 秒，留给回复传输和进程间通信的时间
+READ_SIZE = 4096
+
+_engines: Dict[int, object] = {}
+
+
+def _init_engine():
+    """子进程初始化：构造黑白两个只用于搜索的AIPlayer"""
+    from game_core import GomokuGame
+    from ai_player import AIPlayer
+    for player in (BLACK, WHITE):
+        ai = _engines[player] = AIPlayer(GomokuGame(), player, debug_mode=False)
+        ai.collect_stats = True  # 回复中带上实际完成的深度和节点数
+
+
+def _engine_search(board_bytes: bytes, player: int, deadline: float,
+                   depth: Optional[int]) -> Optional[Tuple[Tuple[int, int], int, int]]:
+    """
+    子进程任务
+    :param deadline: 截止时间（time.time()，进程间可比较）
+    :param depth: 迭代加深的最大深度（None为MAX_DEPTH）
+    :return: (走法, 完成的搜索深度, 节点数)，已经超过截止时间时返回None
+    """
+    remaining = deadline - time.time() - MARGIN
+    if remaining <= 0:
+        return None
+    ai = _engines[player]
+    ai.max_deepening_depth = depth if depth is not None else MAX_DEPTH
+    ai.time_limit = remaining  # 同时限制威胁空间搜索和Minimax（见AIPlayer.threat_search_root）
+    move = ai.find_best_move(BitBoard.from_bytes(board_bytes))
+    return (int(move[0]), int(move[1])), ai.stats.depth, ai.stats.nodes
+
+
+def parse_position(message: Dict) -> Tuple[BitBoard, int]:
+    """
+    请求 -> (位棋盘, 执子方)
+    :raise ValueError: 局面不合法
+    """
+    board = BitBoard()
+    if 'moves' in message:
+        player = BLACK
+        for row, col in message['moves']:
+            row, col = int(row), int(col)
+            if not (0 <= row < BOARD_SIZE and 0 <= col < BOARD_SIZE) or not board.is_empty(row, col):
+                raise ValueError(f"非法落子: {(row, col)}")
+            board.place(row, col, player)
+            player = WHITE if player == BLACK else BLACK
+    elif 'board' in message:
+        cells = message['board']
+        if len(cells) != BOARD_SIZE or any(len(row) != BOARD_SIZE for row in cells):
+            raise ValueError("board必须是15x15数组")
+        if any(cell not in (0, BLACK, WHITE) for row in cells for cell in row):
+            raise ValueError("board只能包含0/1/2")
+        board = BitBoard.from_array(cells)
+        black = bin(board.stones[0]).count('1')
+        player = BLACK if black == board.count - black else WHITE
+    else:
+        raise ValueError("缺少moves或board")
+    player = int(message.get('player', player))
+    if player not in (BLACK, WHITE):
+        raise ValueError(f"非法执子方: {player}")
+    if board.count >= BOARD_SIZE * BOARD_SIZE:
+        raise ValueError("棋盘已满")
+    return board, player
+
+
+class EngineServer:
+    def __init__(self, host: str = "127.0.0.1", port: int = 5556, path: Optional[str] = None,
+                 workers: Optional[int] = None, max_queue: int = 256):
+        """
+        :param path: 给出时监听Unix套接字，否则监听TCP host:port
+        :param workers: 搜索进程数，默认为CPU核数
+        :param max_queue: 同时排队+搜索中的请求上限
+        """
+        self.host = host
+        self.port = port
+        self.path = path
+        self.workers = workers or os.cpu_count() or 1
+        self.max_queue = max_queue
+        self.executor = None
+        self.server = None
+        self.pending = 0  # 排队和搜索中的请求数
+        self.served = 0
+        self.expired = 0
+
+    async def start(self):
+        self.executor = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_engine)
+        if self.path is not None:
+            self.server = await asyncio.start_unix_server(self.handle_client, self.path)
+        else:
+            self.server = await asyncio.start_server(self.handle_client, self.host, self.port)
+            self.port = self.server.sockets[0].getsockname()[1]
+        return self.server
+
+    async def serve_forever(self):
+        if self.server is None:
+            await self.start()
+        print(f"引擎服务已启动: {self.path or f'{self.host}:{self.port}'}，{self.workers}个搜索进程")
+        async with self.server:
+            await self.server.serve_forever()
+
+    async def close(self):
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+
+    async def handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        decoder = FrameDecoder()
+        tasks = set()
+        try:
+            while True:
+                data = await reader.read(READ_SIZE)
+                if not data:
+                    break
+                for message in decoder.feed(data):
+                    task = asyncio.ensure_future(self.handle_request(message, writer))
+                    tasks.add(task)
+                    task.add_done_callback(tasks.discard)
+        except ConnectionError:
+            pass
+        except ProtocolError as e:
+            print(f"消息错误: {e}")
+        finally:
+            for task in tasks:
+                task.cancel()
+            writer.close()
+
+    async def handle_request(self, message: Dict, writer: asyncio.StreamWriter):
+        request_id = message.get('id')
+        try:
+            reply = await self.search(message)
+        except Exception as e:  # 子进程崩溃等异常也要回复，否则调用方会一直等待
+            reply = {'type': 'error', 'reason': f"{type(e).__name__}: {e}"}
+        reply['id'] = request_id
+        if not writer.transport.is_closing():
+            writer.write(encode(reply))
+            await writer.drain()
+
+    async def search(self, message: Dict) -> Dict:
+        """处理一个请求，返回回复消息（不含id）"""
+        if message.get('type') != 'search':
+            return {'type': 'error', 'reason': f"未知请求: {message.get('type')}"}
+        try:
+            board, player = parse_position(message)
+            timeout = float(message.get('deadline', DEFAULT_DEADLINE))
+            depth = int(message['depth']) if message.get('depth') is not None else None
+            if depth is not None and depth < 1:
+                raise ValueError(f"非法深度: {depth}")
+        except (KeyError, TypeError, ValueError) as e:
+            return {'type': 'error', 'reason': str(e)}
+        if self.pending >= self.max_queue:
+            return {'type': 'error', 'reason': 'busy'}
+
+        start = time.time()
+        deadline = start + timeout
+        executor = self.executor
+        self.pending += 1
+        try:
+            future = asyncio.get_running_loop().run_in_executor(
+                executor, _engine_search, board.to_bytes(), player, deadline, depth)
+            # 子进程会在截止前停下，这里到点即回复
+            result = await asyncio.wait_for(future, deadline - time.time())
+        except asyncio.TimeoutError:
+            result = None
+        except BrokenProcessPool:
+            if self.executor is executor:  # 有子进程异常退出，换一个进程池供后续请求使用
+                executor.shutdown(wait=False, cancel_futures=True)
+                self.executor = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_engine)
+            raise
+        finally:
+            self.pending -= 1
+        if result is None:
+            self.expired += 1
+            return {'type': 'error', 'reason': 'deadline'}
+        self.served += 1
+        move, searched, nodes = result
+        return {'type': 'result', 'move': move, 'depth': searched, 'nodes': nodes,
+                'time': round(time.time() - start, 3)}
+
+
+class EngineClient:
+    """
+    引擎服务的阻塞式客户端（匹配服务填补空位时使用）
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 5556, path: Optional[str] = None):
+        if path is not None:
+            self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self.sock.connect(path)
+        else:
+            self.sock = socket.create_connection((host, port))
+        self.decoder = FrameDecoder()
+        self.request_ids = itertools.count(1)
+        self.replies: Dict[int, Dict] = {}
+
+    def search(self, moves=None, board=None, player: Optional[int] = None,
+               deadline: Optional[float] = None, depth: Optional[int] = None) -> Dict:
+        """
+        发送一个请求并等待它的回复
+        :return: result或error消息
+        """
+        request_id = next(self.request_ids)
+        message = {'type': 'search', 'id': request_id}
+        if moves is not None:
+            message['moves'] = [(int(row), int(col)) for row, col in moves]
+        if board is not None:
+            message['board'] = [[int(cell) for cell in row] for row in board]
+        for key, value in (('player', player), ('deadline', deadline), ('depth', depth)):
+            if value is not None:
+                message[key] = value
+        self.sock.sendall(encode(message))
+        while request_id not in self.replies:
+            messages = recv_messages(self.sock, self.decoder)
+            if messages is None:
+                raise ConnectionError("引擎服务已断开")
+            for reply in messages:
+                self.replies[reply.get('id')] = reply
+        reply = self.replies.pop(request_id)
+        if 'move' in reply:
+            reply['move'] = tuple(reply['move'])
+        return reply
+
+    def close(self):
+        self.sock.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="五子棋AI引擎服务")
+    parser.add_argument('--host', default="127.0.0.1")
+    parser.add_argument('--port', type=int, default=5556)
+    parser.add_argument('--unix', default=None, help="Unix套接字路径（给出时不监听TCP）")
+    parser.add_argument('--workers', type=int, default=None, help="搜索进程数，默认CPU核数")
+    parser.add_argument('--max-queue', type=int, default=256)
+    args = parser.parse_args()
+    try:
+        asyncio.run(EngineServer(args.host, args.port, args.unix, args.workers, args.max_queue).serve_forever())
+    except KeyboardInterrupt:
+        pass
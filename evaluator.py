@@ -0,0 +1,131 @@
+from typing import List, Optional
+from bitboard import BitBoard, BOARD_SIZE, CELL_LINES, LINE_MASKS, LINE_WINDOWS
+
+'''
+增量局面评估：
+1.为棋盘上每个完整五元组（四个方向共572个）缓存一个分数，并维护总分
+2.落子或撤销时只重新计算经过该格子的五元组（每个方向最多5个，共最多20个）
+3.叶子节点评估直接读取总分，不再全盘扫描
+4.给出六格评分表时，另外维护所有六格窗口（每个格子最多24个）的分数，用于带两端上下文的棋型
+'''
+
+# 所有五元组：(方向, 线编号, 起始位)
+WINDOWS = [
+    (d, idx, s)
+    for d in range(4)
+    for idx, starts in enumerate(LINE_WINDOWS[d])
+    for s in starts
+]
+
+# 每个格子所在的五元组编号
+WINDOW_IDS = {window: w for w, window in enumerate(WINDOWS)}
+CELL_WINDOWS = [
+    tuple(
+        (WINDOW_IDS[(d, idx, s)], d, idx, s)
+        for d, (idx, bit) in enumerate(lines)
+        for s in LINE_WINDOWS[d][idx]
+        if s <= bit <= s + 4
+    )
+    for lines in CELL_LINES
+]
+
+# 六格窗口：每条线上完整六格窗口的起始位、全部窗口以及每个格子所在的窗口
+LINE_WINDOWS6 = [
+    [[s for s in range(BOARD_SIZE - 5) if (mask >> s) & 0b111111 == 0b111111] for mask in masks]
+    for masks in LINE_MASKS
+]
+WINDOWS6 = [
+    (d, idx, s)
+    for d in range(4)
+    for idx, starts in enumerate(LINE_WINDOWS6[d])
+    for s in starts
+]
+WINDOW6_IDS = {window: w for w, window in enumerate(WINDOWS6)}
+CELL_WINDOWS6 = [
+    tuple(
+        (WINDOW6_IDS[(d, idx, s)], d, idx, s)
+        for d, (idx, bit) in enumerate(lines)
+        for s in LINE_WINDOWS6[d][idx]
+        if s <= bit <= s + 5
+    )
+    for lines in CELL_LINES
+]
+
+
+class IncrementalEvaluator:
+    """
+    绑定一个BitBoard的增量评估器
+    total为全盘所有五元组按评分表求和的结果（黑白双方的棋型都按评分表原样累加），再加上六格窗口的分数
+    """
+
+    def __init__(self, board: BitBoard, black_table: List[int], white_table: List[int],
+                 six_table: Optional[List[int]] = None):
+        """
+        :param board: 要跟踪的位棋盘
+        :param black_table: 以5位掩码为下标的黑棋评分表
+        :param white_table: 以5位掩码为下标的白棋评分表
+        :param six_table: 以 黑6位掩码 | 白6位掩码<<6 为下标的六格评分表（None表示没有六格棋型）
+        """
+        self.board = board
+        self.black_table = black_table
+        self.white_table = white_table
+        self.six_table = six_table
+        self.window_scores = [0] * len(WINDOWS)
+        self.window6_scores = [0] * len(WINDOWS6) if six_table is not None else None
+        self.total = 0
+        self.rebuild()
+
+    def score_window(self, d: int, idx: int, s: int) -> int:
+        """计算单个五元组的分数：只有一方棋子时查表，双方都有则为0"""
+        black_lines, white_lines = self.board.lines
+        b5 = (black_lines[d][idx] >> s) & 0b11111
+        w5 = (white_lines[d][idx] >> s) & 0b11111
+        if not w5:
+            return self.black_table[b5]
+        if not b5:
+            return self.white_table[w5]
+        return 0
+
+    def rebuild(self):
+        """全盘重新计算所有五元组（只在根节点或评分表变化时调用）"""
+        total = 0
+        for w, (d, idx, s) in enumerate(WINDOWS):
+            score = self.score_window(d, idx, s)
+            self.window_scores[w] = score
+            total += score
+        if self.six_table is not None:
+            black_lines, white_lines = self.board.lines
+            for w, (d, idx, s) in enumerate(WINDOWS6):
+                score = self.six_table[((black_lines[d][idx] >> s) & 0b111111)
+                                       | (((white_lines[d][idx] >> s) & 0b111111) << 6)]
+                self.window6_scores[w] = score
+                total += score
+        self.total = total
+
+    def update(self, row: int, col: int):
+        """
+        (row, col)处落子或撤销之后调用，只重算经过该格子的五元组
+        """
+        black_lines, white_lines = self.board.lines
+        black_table, white_table = self.black_table, self.white_table
+        window_scores = self.window_scores
+        delta = 0
+        for w, d, idx, s in CELL_WINDOWS[row * BOARD_SIZE + col]:
+            b5 = (black_lines[d][idx] >> s) & 0b11111
+            w5 = (white_lines[d][idx] >> s) & 0b11111
+            if not w5:
+                score = black_table[b5]
+            elif not b5:
+                score = white_table[w5]
+            else:
+                score = 0
+            delta += score - window_scores[w]
+            window_scores[w] = score
+        if self.six_table is not None:
+            six_table, window6_scores = self.six_table, self.window6_scores
+            for w, d, idx, s in CELL_WINDOWS6[row * BOARD_SIZE + col]:
+                score = six_table[((black_lines[d][idx] >> s) & 0b111111)
+                                  | (((white_lines[d][idx] >> s) & 0b111111) << 6)]
+                delta += score - window6_scores[w]
+                window6_scores[w] = score
+        self.total += delta
@@ -1,5 +1,7 @@
 import numpy as np
-from audio_manager import AudioManager
+import win_detector
+from bitboard import BitBoard
+from transposition import ZOBRIST_KEYS
 
 '''
 五子棋游戏的输赢判定逻辑：
@@ -7,6 +9,8 @@ from audio_manager import AudioManager
 2.check_win_for_position<————是否已经获胜<————check_win
 3.落子是否合法
 4.棋盘状态检查————深拷贝Numpy数组（为了不影响原来对象）
+5.核心逻辑不依赖pygame：落子/胜利/重置通过事件通知，音效和界面按需订阅（服务器、自对弈进程可以直接构造）
+6.push_move/pop_move同步维护棋盘、位棋盘、Zobrist哈希、胜负和轮次，撤销不需要拷贝棋盘；界面用undo/redo悔棋
 '''
 
 class GomokuGame:
@@ -26,6 +30,11 @@ class GomokuGame:
     EMPTY = 0
     BLACK = 1
     WHITE = 2
+    # 事件类型：回调参数分别为 (row, col, player) / (winner) / () / (row, col, player)
+    MOVE_EVENT = 'move'
+    WIN_EVENT = 'win'
+    RESET_EVENT = 'reset'
+    UNDO_EVENT = 'undo'
 #  棋盘状态判定
 
     def __init__(self):
@@ -35,12 +44,31 @@ class GomokuGame:
         self.game_over = False
         self.winner = None
         self.move_history = []   # 记录棋盘的状态（历史记录） 记录（row,col）
-        
-        # 初始化音频管理器
-        self.audio = AudioManager()
-        
+        self.bitboard = BitBoard()  # 与board同步的位棋盘（五连判定、AI搜索根局面）
+        self.hash = 0  # 当前局面的Zobrist哈希（不含轮次）
+        self.state_stack = []  # 与move_history一一对应：落子前的(current_player, game_over, winner)
+        self.redo_stack = []  # 被undo撤销的落子，新的落子会清空
+        self.listeners = {self.MOVE_EVENT: [], self.WIN_EVENT: [], self.RESET_EVENT: [], self.UNDO_EVENT: []}
+        self.audio = None  # 调用initialize_audio()后才创建音频管理器
+
+    def add_listener(self, event, callback):
+        """订阅事件（MOVE_EVENT / WIN_EVENT / RESET_EVENT / UNDO_EVENT）"""
+        self.listeners[event].append(callback)
+
+    def remove_listener(self, event, callback):
+        if callback in self.listeners[event]:
+            self.listeners[event].remove(callback)
+
+    def notify(self, event, *args):
+        for callback in self.listeners[event]:
+            callback(*args)
+
     def initialize_audio(self, piece_sound_path=None, win_sound_path=None, bgm_path=None):
-        """初始化游戏音频"""
+        """初始化游戏音频（此时才导入pygame），音频管理器订阅落子/胜利/重置事件"""
+        if self.audio is None:
+            from audio_manager import AudioManager
+            self.audio = AudioManager()
+            self.audio.subscribe(self)
         if piece_sound_path:
             self.audio.load_sound('piece', piece_sound_path)
         if win_sound_path:
@@ -55,30 +83,77 @@ class GomokuGame:
         self.game_over = False
         self.winner = None
         self.move_history = []
-        # 重新开始背景音乐
-        self.audio.play_background_music()
+        self.bitboard = BitBoard()
+        self.hash = 0
+        self.state_stack = []
+        self.redo_stack = []
+        self.notify(self.RESET_EVENT)
 
     def make_move(self, row, col):
         # 落子位置检查
         if self.game_over or not self.is_valid_move(row, col):
             return False
 
-        self.board[row][col] = self.current_player
+        self.redo_stack = []
+        self.play(row, col)
+        return True
+
+    def play(self, row, col):
+        """落子并发出落子/胜利事件（make_move和redo共用）"""
+        player = self.current_player
+        self.push_move(row, col)
+        self.notify(self.MOVE_EVENT, row, col, player)
+        if self.winner is not None:
+            self.notify(self.WIN_EVENT, self.winner)
+
+    def push_move(self, row, col):
+        """
+        落子（调用方保证合法），不发出事件，与pop_move配对使用
+        同步更新棋盘、位棋盘、哈希、胜负判定和轮次
+        """
+        player = self.current_player
+        self.board[row, col] = player
+        self.bitboard.place(row, col, player)
+        self.hash ^= ZOBRIST_KEYS[player - 1][row * self.BOARD_SIZE + col]
         self.move_history.append((row, col))
-        
-        # 播放落子音效
-        self.audio.play_sound('piece')
+        self.state_stack.append((player, self.game_over, self.winner))
 
-        if self.check_win(row, col):     # 判定是否游戏结束
+        if self.bitboard.is_five_at(row, col, player):     # 判定是否游戏结束（只检查经过落子点的四条线）
             self.game_over = True
-            self.winner = self.current_player
-            # 播放胜利音效
-            self.audio.play_sound('win')
-        elif self.is_board_full():
+            self.winner = player
+        elif self.bitboard.is_full():
             self.game_over = True
         else:
             self.switch_player()
 
+    def pop_move(self):
+        """
+        撤销最后一步落子，恢复落子前的全部状态
+        :return: 被撤销的(row, col)
+        """
+        row, col = self.move_history.pop()
+        player, self.game_over, self.winner = self.state_stack.pop()
+        self.board[row, col] = self.EMPTY
+        self.bitboard.remove(row, col, player)
+        self.hash ^= ZOBRIST_KEYS[player - 1][row * self.BOARD_SIZE + col]
+        self.current_player = player
+        return row, col
+
+    def undo(self):
+        """悔棋：撤销最后一步，可用redo恢复"""
+        if not self.move_history:
+            return False
+        player = self.state_stack[-1][0]
+        row, col = self.pop_move()
+        self.redo_stack.append((row, col))
+        self.notify(self.UNDO_EVENT, row, col, player)
+        return True
+
+    def redo(self):
+        """恢复最近一次被undo撤销的落子"""
+        if not self.redo_stack:
+            return False
+        self.play(*self.redo_stack.pop())
         return True
 
     def is_valid_move(self, row, col):    # 验证落子可行性
@@ -117,16 +192,11 @@ class GomokuGame:
         return False
 
     def check_win_for_position(self, player):
-        """检查指定玩家是否已经获胜"""
-        for row in range(self.BOARD_SIZE):
-            for col in range(self.BOARD_SIZE):
-                if self.board[row][col] == player:
-                    if self.check_win(row, col):
-                        return True
-        return False
+        """检查指定玩家是否已经获胜（整盘打包成位掩码后移位判定）"""
+        return win_detector.has_five(self.board, player)
 
     def is_board_full(self):
-        return np.all(self.board != self.EMPTY)
+        return self.bitboard.is_full()
 
     def get_board(self):
         return self.board.copy()
\ No newline at end of file
@@ -0,0 +1,392 @@
+import argparse
+import asyncio
+import itertools
+import secrets
+from collections import deque
+from typing import Dict, Optional, Set
+from game_core import GomokuGame
+from protocol import (FrameDecoder, ProtocolError, TIMEOUT, apply_moves, encode, hello_message,
+                      resume_messages)
+
+'''
+多房间联机服务器（无界面，asyncio单线程）：
+1.所有连接在一个事件循环中处理，不再每个连接一个线程；一个进程可以同时承载数千个房间
+2.客户端连上后先发hello，随后进入等待队列，凑齐两人即开一个房间：先到的执黑，通过start消息告知各自的颜色和会话标识
+3.每个房间有一个GomokuGame，服务器校验落子（轮次、位置、是否已结束），合法才转发给对手
+  不合法时给发送方回一个sync消息（完整落子序列），客户端据此恢复与服务器一致的棋局
+4.对手主动退出（leave）或断线超过保留时间时，给留下的一方发leave消息，并把留下的一方重新放回等待队列
+5.消息格式与NetworkGame相同（protocol.py），原有的pygame客户端选择"加入房间"即可连接
+6.对方接收过慢、发送缓冲区积压超过上限时直接断开，避免一个慢连接占满内存
+7.观战：观众连接单独的端口，发送watch消息选择房间（不给房间号时观看最新的房间）
+  每个消息只编码一次，同一份字节写给对手和所有观众；每个观众有独立的发送队列和发送协程，
+  慢观众不会拖慢对局和其他观众；队列积压超过上限时丢弃积压的消息，改为发送一次整局快照（sync）
+  中途加入的观众同样只收到一个快照，不需要重放全部历史消息
+8.断线重连：超过TIMEOUT收不到消息（客户端空闲时会发心跳）视为断线，房间保留RECONNECT_GRACE秒
+  客户端带着会话标识重连后回到原房间，按hello中的局号和步数只补发缺少的落子；客户端领先时由客户端补发
+  落子带序号，重复的落子直接丢弃
+'''
+
+READ_SIZE = 4096
+MAX_BUFFER = 1 << 16  # 单个连接允许积压的未发送字节数
+SPECTATOR_QUEUE = 64  # 单个观众允许排队的消息数，超过后合并为快照
+RECONNECT_GRACE = 30.0  # 秒，断线后保留房间等待重连的时间
+
+
+class Client:
+    """服务器端的一个连接"""
+
+    def __init__(self, client_id: int, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.id = client_id
+        self.reader = reader
+        self.writer = writer
+        self.room: Optional['Room'] = None
+        self.player = None  # 在房间中的颜色（BLACK/WHITE）
+        self.session = None  # 进入房间时分配，重连时凭此回到房间
+        self.expire_handle = None  # 断线后的房间保留计时
+
+    def send_bytes(self, data: bytes):
+        transport = self.writer.transport
+        if transport.is_closing():
+            return
+        if transport.get_write_buffer_size() > MAX_BUFFER:
+            transport.abort()  # 读取过慢，放弃这个连接
+            return
+        self.writer.write(data)
+
+
+class Spectator:
+    """观众连接：发送队列由单独的协程写出，积压过多时合并为快照"""
+
+    def __init__(self, writer: asyncio.StreamWriter):
+        self.writer = writer
+        self.room: Optional['Room'] = None
+        self.queue = deque()
+        self.ready = asyncio.Event()
+        self.stale = False  # 为True时积压已被丢弃，下次发送整局快照
+        self.coalesced = 0  # 合并为快照的次数
+
+    def push(self, data: bytes):
+        if self.stale:
+            if self.room is not None:
+                return  # 快照会包含这条消息
+            self.queue.append(data)  # 已离开房间（对局结束等），不会再有快照，这条消息必须送达
+        elif len(self.queue) >= SPECTATOR_QUEUE:
+            self.queue.clear()
+            self.stale = True
+            self.coalesced += 1
+        else:
+            self.queue.append(data)
+        self.ready.set()
+
+    def resync(self):
+        """下次发送时只发快照"""
+        self.queue.clear()
+        self.stale = True
+        self.ready.set()
+
+
+class Room:
+    """一局对弈：两个客户端和服务器端的棋局，以及观众"""
+
+    def __init__(self, room_id: int, black: Client, white: Client):
+        self.id = room_id
+        self.game = GomokuGame()
+        self.players = {GomokuGame.BLACK: black, GomokuGame.WHITE: white}
+        self.game_id = 0  # 局号，每次重置加一
+        self.spectators: Set[Spectator] = set()
+        self.snapshot_data = None  # 编码好的快照，棋局变化时作废
+
+    def opponent(self, client: Client) -> Client:
+        return self.players[GomokuGame.WHITE if client.player == GomokuGame.BLACK else GomokuGame.BLACK]
+
+    def sync_message(self) -> Dict:
+        return {'type': 'sync', 'moves': self.game.move_history}
+
+    def snapshot(self, binary: bool) -> bytes:
+        """整局快照（同一局面的所有观众共用一次编码）"""
+        if self.snapshot_data is None:
+            self.snapshot_data = encode(self.sync_message(), binary)
+        return self.snapshot_data
+
+
+class GameServer:
+    def __init__(self, host: str = "127.0.0.1", port: int = 5555, binary: bool = True,
+                 watch_port: Optional[int] = 5557):
+        """
+        :param watch_port: 观战端口，None时不接受观众
+        """
+        self.host = host
+        self.port = port
+        self.binary = binary
+        self.watch_port = watch_port
+        self.server = None
+        self.watch_server = None
+        self.rooms: Dict[int, Room] = {}
+        self.waiting: Optional[Client] = None  # 等待配对的客户端
+        self.sessions: Dict[str, Client] = {}
+        self.client_ids = itertools.count(1)
+        self.room_ids = itertools.count(1)
+        self.moves = 0  # 累计转发的落子数
+
+    async def start(self):
+        self.server = await asyncio.start_server(self.handle_client, self.host, self.port, backlog=1024)
+        self.port = self.server.sockets[0].getsockname()[1]  # port=0时由系统分配
+        if self.watch_port is not None:
+            self.watch_server = await asyncio.start_server(self.handle_spectator, self.host, self.watch_port,
+                                                           backlog=1024)
+            self.watch_port = self.watch_server.sockets[0].getsockname()[1]
+        return self.server
+
+    async def serve_forever(self):
+        if self.server is None:
+            await self.start()
+        print(f"服务器已启动: {self.host}:{self.port}" +
+              (f"，观战端口: {self.watch_port}" if self.watch_server is not None else ""))
+        async with self.server:
+            await self.server.serve_forever()
+
+    async def close(self):
+        for server in (self.server, self.watch_server):
+            if server is not None:
+                server.close()
+                await server.wait_closed()
+
+    def send(self, client: Client, message: Dict):
+        client.send_bytes(encode(message, self.binary))
+
+    def broadcast(self, room: Room, message: Dict, sender: Client):
+        """消息只编码一次，发给对手和所有观众"""
+        room.snapshot_data = None
+        data = encode(message, self.binary)
+        room.opponent(sender).send_bytes(data)
+        for spectator in room.spectators:
+            spectator.push(data)
+
+    async def handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        client = None  # 收到第一个消息后才知道是新客户端还是重连
+        decoder = FrameDecoder()
+        try:
+            while True:
+                data = await asyncio.wait_for(reader.read(READ_SIZE), TIMEOUT)
+                if not data:
+                    break
+                for message in decoder.feed(data):
+                    if client is None:
+                        client = self.greet(message, reader, writer)
+                        if message.get('type') == 'hello':
+                            continue
+                    self.handle_message(client, message)
+                await writer.drain()
+        except (ConnectionError, asyncio.TimeoutError):
+            pass  # 断开或超时，按断线处理
+        except ProtocolError as e:
+            print(f"客户端{getattr(client, 'id', '?')}消息错误: {e}")
+        finally:
+            if client is not None:
+                self.disconnect(client, writer)
+            writer.close()
+
+    def greet(self, message: Dict, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> Client:
+        """连接的第一个消息：带有效会话的hello回到原房间，否则作为新客户端配对"""
+        session = message.get('session')
+        client = self.sessions.get(session) if message.get('type') == 'hello' and isinstance(session, str) else None
+        if client is not None and client.room is not None:
+            old_writer = client.writer
+            client.reader, client.writer = reader, writer
+            if client.expire_handle is not None:
+                client.expire_handle.cancel()
+                client.expire_handle = None
+            if old_writer is not writer:
+                old_writer.close()
+            self.resume(client, message)
+            return client
+        client = Client(next(self.client_ids), reader, writer)
+        self.match(client)
+        return client
+
+    def disconnect(self, client: Client, writer: asyncio.StreamWriter):
+        """连接断开：在房间中时保留一段时间等待重连"""
+        if client.writer is not writer:
+            return  # 已经用新的连接重连
+        if client.room is None:
+            self.leave(client)
+            return
+        client.expire_handle = asyncio.get_running_loop().call_later(RECONNECT_GRACE, self.expire, client, writer)
+
+    def expire(self, client: Client, writer: asyncio.StreamWriter):
+        client.expire_handle = None
+        if client.writer is writer:
+            self.leave(client)
+
+    def match(self, client: Client):
+        """把客户端放入等待队列，凑齐两人开一个房间"""
+        waiting = self.waiting
+        if waiting is None or waiting.writer.transport.is_closing():
+            self.waiting = client
+            return
+        self.waiting = None
+        room = Room(next(self.room_ids), waiting, client)
+        self.rooms[room.id] = room
+        for player, member in room.players.items():
+            member.room = room
+            member.player = player
+            member.session = secrets.token_hex(8)
+            self.sessions[member.session] = member
+            self.send(member, {'type': 'start', 'player': player, 'room': room.id, 'session': member.session})
+
+    def leave(self, client: Client):
+        if self.waiting is client:
+            self.waiting = None
+        self.sessions.pop(client.session, None)
+        room = client.room
+        if room is None:
+            return
+        del self.rooms[room.id]
+        other = room.opponent(client)
+        client.room = other.room = None
+        self.sessions.pop(other.session, None)
+        data = encode({'type': 'leave'}, self.binary)
+        for spectator in room.spectators:
+            spectator.room = None
+            spectator.push(data)
+        room.spectators.clear()
+        if not other.writer.transport.is_closing():
+            self.send(other, {'type': 'leave'})
+            self.match(other)
+
+    def handle_message(self, client: Client, message: Dict):
+        if message.get('type') == 'ping':
+            self.send(client, {'type': 'pong'})
+            return
+        if message.get('type') == 'leave':  # 主动退出，不保留房间
+            self.leave(client)
+            return
+        room = client.room
+        if room is None:
+            return  # 还没有对手
+        kind = message.get('type')
+        game = room.game
+        if kind == 'move':
+            try:
+                seq = int(message.get('seq', len(game.move_history)))
+                row, col = (int(value) for value in message['move'])
+            except (KeyError, TypeError, ValueError):
+                self.send(client, room.sync_message())
+                return
+            if seq < len(game.move_history):
+                return  # 重复的落子
+            if seq > len(game.move_history):
+                self.send(client, hello_message(game.move_history, room.game_id))  # 客户端领先，请求补发
+                return
+            if game.current_player != client.player or not game.make_move(row, col):
+                self.send(client, room.sync_message())
+                return
+            self.moves += 1
+            self.broadcast(room, {'type': 'move', 'move': (row, col), 'seq': seq}, client)
+        elif kind == 'reset':
+            try:
+                game_id = int(message.get('game', room.game_id + 1))
+            except (TypeError, ValueError):
+                self.send(client, room.sync_message())
+                return
+            if game_id <= room.game_id:
+                return  # 双方同时重置或重复消息
+            room.game_id = game_id
+            game.reset_game()
+            self.broadcast(room, {'type': 'reset', 'game': game_id}, client)
+        elif kind == 'resume':  # 客户端补发重连前没送达的落子
+            try:
+                seq = int(message['seq'])
+                moves = [(int(row), int(col)) for row, col in message['moves']]
+            except (KeyError, TypeError, ValueError):
+                self.send(client, room.sync_message())
+                return
+            start = len(game.move_history)
+            if apply_moves(game, seq, moves, client.player) is None:
+                self.send(client, hello_message(game.move_history, room.game_id))
+                return
+            for seq in range(start, len(game.move_history)):
+                self.moves += 1
+                self.broadcast(room, {'type': 'move', 'move': game.move_history[seq], 'seq': seq}, client)
+        elif kind == 'hello':  # 客户端发现缺少落子
+            self.resume(client, message)
+
+    def resume(self, client: Client, message: Dict):
+        """按客户端hello中的局号和步数补发落子；字段不合法时发送整局快照"""
+        room = client.room
+        try:
+            peer_game, peer_seq = int(message.get('game', 0)), int(message.get('seq', 0))
+        except (TypeError, ValueError):
+            self.send(client, room.sync_message())
+            return
+        for reply in resume_messages(room.game.move_history, room.game_id, peer_game, peer_seq):
+            self.send(client, reply)
+
+    async def handle_spectator(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        spectator = Spectator(writer)
+        decoder = FrameDecoder()
+        sender = asyncio.ensure_future(self.pump(spectator))
+        try:
+            while True:
+                data = await reader.read(READ_SIZE)
+                if not data:
+                    break
+                for message in decoder.feed(data):
+                    if message.get('type') == 'watch':
+                        self.watch(spectator, message.get('room'))
+                    elif message.get('type') == 'hello':  # 观众发现缺少落子，重新发送快照
+                        spectator.resync()
+                    elif message.get('type') == 'ping':
+                        spectator.push(encode({'type': 'pong'}, self.binary))
+        except ConnectionError:
+            pass
+        except ProtocolError as e:
+            print(f"观众消息错误: {e}")
+        finally:
+            sender.cancel()
+            if spectator.room is not None:
+                spectator.room.spectators.discard(spectator)
+            writer.close()
+
+    def watch(self, spectator: Spectator, room_id: Optional[int] = None):
+        """观众进入房间（room_id为None时进入最新的房间），随后先收到一个快照"""
+        if spectator.room is not None:
+            spectator.room.spectators.discard(spectator)
+            spectator.room = None
+        room = self.rooms.get(room_id) if room_id is not None else (
+            self.rooms[next(reversed(self.rooms))] if self.rooms else None)
+        if room is None:
+            spectator.push(encode({'type': 'rooms', 'rooms': list(self.rooms)[-100:]}, self.binary))
+            return
+        spectator.room = room
+        room.spectators.add(spectator)
+        spectator.resync()
+        spectator.queue.append(encode({'type': 'watch', 'room': room.id}, self.binary))  # 紧跟在快照之后
+
+    async def pump(self, spectator: Spectator):
+        """观众的发送协程：等待写缓冲区排空期间到达的消息在队列中积压或合并"""
+        writer = spectator.writer
+        while True:
+            await spectator.ready.wait()
+            spectator.ready.clear()
+            if spectator.stale:
+                spectator.stale = False
+                if spectator.room is not None:
+                    writer.write(spectator.room.snapshot(self.binary))
+            if spectator.queue:
+                writer.writelines(spectator.queue)
+                spectator.queue.clear()
+            await writer.drain()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="五子棋多房间联机服务器")
+    parser.add_argument('--host', default="0.0.0.0")
+    parser.add_argument('--port', type=int, default=5555)
+    parser.add_argument('--watch-port', type=int, default=5557, help="观战端口")
+    parser.add_argument('--json', action='store_true', help="全部消息使用JSON编码（便于抓包调试）")
+    args = parser.parse_args()
+    try:
+        asyncio.run(GameServer(args.host, args.port, binary=not args.json, watch_port=args.watch_port).serve_forever())
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,334 @@
+import argparse
+import asyncio
+import json
+import os
+import random
+import resource
+import socket
+import subprocess
+import sys
+import time
+from typing import Dict, List, Optional
+import numpy as np
+from game_core import GomokuGame
+from protocol import FrameDecoder, HEARTBEAT, encode
+
+'''
+联机压力测试（全部在本机运行）：
+1.默认在子进程中启动game_server.py，也可以用--port连接已经运行的服务器（给出--pid时同样统计内存）
+2.用asyncio模拟大量无界面客户端：连接、hello、配对，全部配对完成后统一开始下棋（随机或AI走法）
+  每局结束后黑方重置，按--games下完指定局数后主动退出
+  每个客户端空闲超过HEARTBEAT时发送心跳（否则等待配对或AI思考时会被服务器按超时断开）
+  AI走法在线程池中计算，不阻塞其他客户端的收发
+3.报告：连接建立速率、落子吞吐（步/秒）、落子往返延迟的p50/p99（从发出落子到对手收到，
+  模拟客户端都在同一进程内，用同一个时钟计时）、服务器每个房间的内存（配对前后的RSS之差/房间数）
+4.用法：python loadtest.py --clients 2000 --games 1 --json load.json
+'''
+
+CONNECT_CONCURRENCY = 256  # 同时发起的连接数（超过服务器的listen队列会被拒绝或重试）
+
+
+class LoadStats:
+    def __init__(self):
+        self.connect_times: List[float] = []  # 每个连接的建立耗时
+        self.latencies: List[float] = []  # 落子从发出到对手收到的耗时
+        self.sent: Dict = {}  # (房间, 局号, 序号) -> 发出时间
+        self.moves = 0
+        self.games = 0
+        self.rejected = 0  # 被服务器拒绝（收到sync）的落子数
+        self.dropped = 0  # 对手提前退出或连接异常的客户端数
+        self.matched = 0
+
+
+def percentile(values: List[float], q: float) -> float:
+    return float(np.percentile(values, q)) if values else 0.0
+
+
+def rss_kb(pid: int) -> Optional[int]:
+    """进程的常驻内存（KB），只支持Linux的/proc"""
+    try:
+        with open(f'/proc/{pid}/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+def raise_fd_limit():
+    """每个模拟客户端占一个文件描述符，把软上限提到硬上限"""
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft < hard:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def spawn_server(port: int) -> subprocess.Popen:
+    """在子进程中启动多房间服务器，等到端口可以连接为止"""
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'game_server.py')
+    process = subprocess.Popen([sys.executable, script, '--host', '127.0.0.1', '--port', str(port),
+                                '--watch-port', '0'], stdout=subprocess.DEVNULL)
+    deadline = time.time() + 10
+    while time.time() < deadline:
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=0.5).close()
+            return process
+        except OSError:
+            time.sleep(0.05)
+    process.kill()
+    raise RuntimeError("服务器启动失败")
+
+
+class SimulatedClient:
+    """一个无界面客户端：本地用GomokuGame跟踪棋局，只在轮到自己时落子"""
+
+    def __init__(self, index: int, stats: LoadStats, games: int, max_moves: Optional[int], ai_depth: Optional[int]):
+        self.index = index
+        self.stats = stats
+        self.games = games
+        self.max_moves = max_moves
+        self.ai_depth = ai_depth
+        self.rng = random.Random(index)
+        self.game = GomokuGame()
+        self.ai = None
+        self.game_id = 0
+        self.room = None
+        self.player = None
+        self.reader = None
+        self.writer = None
+        self.decoder = FrameDecoder()
+        self.pending = []
+        self.last_sent = 0.0
+        self.heartbeat_task = None
+
+    async def recv(self) -> Optional[Dict]:
+        while not self.pending:
+            data = await self.reader.read(4096)
+            if not data:
+                return None
+            self.pending.extend(self.decoder.feed(data))
+        return self.pending.pop(0)
+
+    def send(self, message: Dict):
+        self.writer.write(encode(message))
+        self.last_sent = time.perf_counter()
+
+    async def heartbeat(self):
+        """空闲超过HEARTBEAT时发送心跳，与network_game.py的客户端相同"""
+        while not self.writer.is_closing():
+            await asyncio.sleep(HEARTBEAT - (time.perf_counter() - self.last_sent))
+            if not self.writer.is_closing() and time.perf_counter() - self.last_sent >= HEARTBEAT:
+                self.send({'type': 'ping'})
+
+    def choose_move(self):
+        if self.ai_depth is not None:
+            if self.ai is None:
+                from ai_player import AIPlayer
+                self.ai = AIPlayer(self.game, self.player, debug_mode=False)
+                self.ai.max_depth = self.ai_depth
+                self.ai.use_threat_search = False
+            return self.ai.find_best_move()
+        empty = np.flatnonzero(self.game.board == GomokuGame.EMPTY)
+        return divmod(int(self.rng.choice(empty)), GomokuGame.BOARD_SIZE)
+
+    def game_finished(self) -> bool:
+        return self.game.game_over or (self.max_moves is not None and len(self.game.move_history) >= self.max_moves)
+
+    async def connect(self, host: str, port: int, semaphore: asyncio.Semaphore):
+        async with semaphore:
+            start = time.perf_counter()
+            self.reader, self.writer = await asyncio.open_connection(host, port)
+            self.stats.connect_times.append(time.perf_counter() - start)
+        self.send({'type': 'hello', 'game': 0, 'seq': 0})
+        self.heartbeat_task = asyncio.ensure_future(self.heartbeat())
+
+    async def play(self, all_matched: asyncio.Event, go: asyncio.Event, clients: int):
+        """
+        :param all_matched: 最后一个客户端配对成功时设置
+        :param go: 由run_load在统计完内存、开始计时后设置，之后才开始落子
+        """
+        stats = self.stats
+        message = await self.recv()
+        while message is not None and message.get('type') == 'pong':
+            message = await self.recv()
+        if message is None or message.get('type') != 'start':
+            stats.dropped += 1
+            return
+        self.player, self.room = message['player'], message['room']
+        stats.matched += 1
+        if stats.matched == clients:
+            all_matched.set()
+        await go.wait()
+
+        finished = 0
+        counted = False  # 本局是否已计入finished（白方要等到收到reset才开始下一局）
+        while finished < self.games:
+            if self.game_finished() and not counted:
+                finished += 1
+                counted = True
+                if self.player == GomokuGame.BLACK:
+                    stats.games += 1
+                if finished >= self.games:
+                    break
+                if self.player == GomokuGame.BLACK:
+                    self.game_id += 1
+                    self.game.reset_game()
+                    counted = False
+                    self.send({'type': 'reset', 'game': self.game_id})
+                    continue
+            if self.game.current_player == self.player and not self.game_finished():
+                if self.ai_depth is not None:
+                    # AI搜索放到线程池，事件循环继续为其他客户端收发消息和心跳
+                    row, col = await asyncio.get_running_loop().run_in_executor(None, self.choose_move)
+                else:
+                    row, col = self.choose_move()
+                seq = len(self.game.move_history)
+                self.game.make_move(row, col)
+                stats.sent[(self.room, self.game_id, seq)] = time.perf_counter()
+                self.send({'type': 'move', 'move': (row, col), 'seq': seq})
+                await self.writer.drain()
+                continue
+            message = await self.recv()
+            if message is None or message['type'] == 'leave':
+                stats.dropped += 1
+                return
+            kind = message['type']
+            if kind == 'move':
+                sent = stats.sent.pop((self.room, self.game_id, message['seq']), None)
+                if sent is not None:
+                    stats.latencies.append(time.perf_counter() - sent)
+                stats.moves += 1
+                self.game.make_move(*message['move'])
+            elif kind == 'reset':
+                self.game_id = message.get('game', self.game_id + 1)
+                self.game.reset_game()
+                counted = False
+            elif kind == 'ping':
+                self.send({'type': 'pong'})
+            elif kind == 'sync':
+                stats.rejected += 1
+                self.game.reset_game()
+                for row, col in message['moves']:
+                    self.game.make_move(row, col)
+        self.send({'type': 'leave'})
+        await self.writer.drain()
+
+    def close(self):
+        if self.heartbeat_task is not None:
+            self.heartbeat_task.cancel()
+        if self.writer is not None:
+            self.writer.close()
+
+
+async def run_load(host: str, port: int, clients: int, games: int = 1, max_moves: Optional[int] = None,
+                   ai_depth: Optional[int] = None, server_pid: Optional[int] = None) -> Dict:
+    """
+    :param clients: 模拟客户端数（取偶数，两两配对）
+    :param max_moves: 每局最多下多少步（None为下到分出胜负或满盘）
+    :param ai_depth: 给出时用该深度的AIPlayer选择走法，否则随机落子（AI计算在压测进程的线程池中进行，会拉高延迟）
+    """
+    clients += clients % 2
+    stats = LoadStats()
+    baseline = rss_kb(server_pid) if server_pid else None
+    simulated = [SimulatedClient(i, stats, games, max_moves, ai_depth) for i in range(clients)]
+    semaphore = asyncio.Semaphore(CONNECT_CONCURRENCY)
+    all_matched = asyncio.Event()
+    go = asyncio.Event()
+
+    connect_start = time.perf_counter()
+    results = await asyncio.gather(*(client.connect(host, port, semaphore) for client in simulated),
+                                   return_exceptions=True)
+    connect_time = time.perf_counter() - connect_start
+    connected = [client for client, result in zip(simulated, results) if not isinstance(result, Exception)]
+    failed = clients - len(connected)
+
+    pairs = len(connected) // 2
+    tasks = [asyncio.ensure_future(client.play(all_matched, go, pairs * 2)) for client in connected]
+    await all_matched.wait()
+    for client in connected:
+        if client.player is None:
+            client.close()  # 有连接失败时可能剩下一个无法配对的客户端
+    await asyncio.sleep(0.2)  # 等服务器处理完配对再统计内存
+    matched_rss = rss_kb(server_pid) if server_pid else None
+    play_start = time.perf_counter()
+    go.set()  # 内存统计和计时开始之后才放开落子
+    await asyncio.gather(*tasks)
+    play_time = time.perf_counter() - play_start
+    for client in simulated:
+        client.close()
+
+    rooms = pairs
+    return {
+        'clients': clients,
+        'connect_failed': failed,
+        'rooms': rooms,
+        'connect_time': connect_time,
+        'connects_per_sec': len(connected) / connect_time if connect_time else 0.0,
+        'connect_p50_ms': percentile(stats.connect_times, 50) * 1000,
+        'connect_p99_ms': percentile(stats.connect_times, 99) * 1000,
+        'games': stats.games,
+        'moves': stats.moves,
+        'play_time': play_time,
+        'moves_per_sec': stats.moves / play_time if play_time else 0.0,
+        'rtt_p50_ms': percentile(stats.latencies, 50) * 1000,
+        'rtt_p99_ms': percentile(stats.latencies, 99) * 1000,
+        'rejected': stats.rejected,
+        'dropped': stats.dropped,
+        'server_rss_kb': matched_rss,
+        'memory_per_room_kb': (matched_rss - baseline) / rooms if matched_rss and baseline and rooms else None,
+    }
+
+
+def format_report(result: Dict) -> str:
+    lines = [
+        f"客户端 {result['clients']}（连接失败 {result['connect_failed']}），房间 {result['rooms']}",
+        f"连接：{result['connects_per_sec']:.0f} 个/秒，耗时 p50 {result['connect_p50_ms']:.1f}ms "
+        f"p99 {result['connect_p99_ms']:.1f}ms",
+        f"落子：{result['moves']} 步 / {result['play_time']:.2f}s = {result['moves_per_sec']:.0f} 步/秒，"
+        f"完成 {result['games']} 局",
+        f"往返延迟：p50 {result['rtt_p50_ms']:.2f}ms  p99 {result['rtt_p99_ms']:.2f}ms",
+    ]
+    if result['memory_per_room_kb'] is not None:
+        lines.append(f"服务器内存：{result['server_rss_kb'] / 1024:.1f}MB，每个房间 {result['memory_per_room_kb']:.1f}KB")
+    if result['rejected'] or result['dropped']:
+        lines.append(f"被拒绝的落子 {result['rejected']}，异常退出的客户端 {result['dropped']}")
+    return '\n'.join(lines)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="联机服务器压力测试")
+    parser.add_argument('--clients', type=int, default=1000, help="模拟客户端数")
+    parser.add_argument('--games', type=int, default=1, help="每个房间下的局数")
+    parser.add_argument('--max-moves', type=int, default=None, help="每局最多步数")
+    parser.add_argument('--ai', type=int, default=None, metavar='DEPTH', help="用AI走法（搜索深度），默认随机落子")
+    parser.add_argument('--port', type=int, default=None, help="连接已运行的服务器（默认启动一个子进程）")
+    parser.add_argument('--pid', type=int, default=None, help="已运行服务器的进程号（统计内存用）")
+    parser.add_argument('--json', help="把结果写入JSON文件（'-'为标准输出）")
+    args = parser.parse_args()
+
+    raise_fd_limit()
+    server = None
+    port, pid = args.port, args.pid
+    if port is None:
+        port = free_port()
+        server = spawn_server(port)
+        pid = server.pid
+    try:
+        result = asyncio.run(run_load('127.0.0.1', port, args.clients, args.games, args.max_moves, args.ai, pid))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+    if args.json == '-':
+        print(json.dumps(result, indent=2))
+    else:
+        print(format_report(result))
+        if args.json:
+            with open(args.json, 'w') as f:
+                json.dump(result, f, indent=2)
@@ -26,6 +26,10 @@ class LocalGame:
                 if event.type == pygame.KEYDOWN:
                     if event.key == pygame.K_r:  # 重置游戏
                         self.game.reset_game()
+                    elif event.key == pygame.K_z:  # 悔棋
+                        self.game.undo()
+                    elif event.key == pygame.K_y:  # 恢复悔掉的棋
+                        self.game.redo()
                     elif event.key == pygame.K_ESCAPE:
                         running = False
 
@@ -1,7 +1,9 @@
 import socket
 import threading
-import json
+import time
 from game_core import GomokuGame
+from protocol import (FrameDecoder, ProtocolError, HEARTBEAT, TIMEOUT, apply_moves, encode_batch,
+                      hello_message, recv_messages, resume_messages)
 from opengl_renderer import OpenGLRenderer
 import pygame
 
@@ -9,11 +11,22 @@ import pygame
     这里使用Socket通信来实现服务端（server）和客户端（client）的连接
     直接调用socket库提供的高层API接口，所以自没有定义SYN,ACK等包
     服务端和客户端均由一个渲染的主线程和用于接受消息的子线程
+    消息按protocol.py的格式分帧（长度前缀），落子只占4字节；每帧产生的消息合并后一次sendall发出
+    客户端也可以连接多房间服务器（game_server.py）：颜色由服务器的start消息分配，落子被拒绝时按sync消息恢复棋局
+    观战模式连接服务器的观战端口，只接收落子，不能落子或重置
+    断线重连：落子带序号（重复的丢弃，缺失时请求补发），空闲时发送心跳，超过TIMEOUT收不到任何消息视为断线
+    断线后客户端自动重连、服务端重新等待连接，连上后双方交换hello（局号+步数），只补发缺少的落子
 '''
 
+RECONNECT_TIMEOUT = 30.0  # 秒，超过该时间仍未重连成功则放弃
+
 # 初始化
 class NetworkGame:
-    def __init__(self, is_server=False, host="127.0.0.1", port=5555):
+    def __init__(self, is_server=False, host="127.0.0.1", port=5555, watch_room=None, spectate=False):
+        """
+        :param spectate: 观战模式（port为服务器的观战端口）
+        :param watch_room: 观看的房间号，None为最新的房间
+        """
         self.game = GomokuGame()
         self.renderer = OpenGLRenderer(self.game)
         self.is_server = is_server   #bool 类型
@@ -22,66 +35,181 @@ class NetworkGame:
         self.sock = None
         self.connection = None
         self.running = True
+        self.spectate = spectate
+        self.watch_room = watch_room
+        self.player = None if spectate else GomokuGame.BLACK if is_server else GomokuGame.WHITE  # 本方颜色，黑棋先手
         self.my_turn = is_server  # 服务器先手
+        self.binary = True  # 落子/重置使用紧凑二进制编码（False时全部用JSON）
+        self.outbox = []  # 待发送的消息，每帧末尾由flush()合并发送
+        self.send_lock = threading.Lock()  # 接收线程（回复心跳、补发落子）和主线程都会发送
+        self.last_sent = 0.0
+        self.game_id = 0  # 局号，每次重置加一
+        self.session = None  # 多房间服务器分配的会话标识，重连时据此回到原房间
+        self.peer_left = False  # 点对点对战中对方主动退出，不再重连
 # 启动服务器
     def start_server(self):
         self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM) # 创建TCP套接字
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
         self.sock.bind((self.host, self.port))   # 绑定地址和端口
         self.sock.listen(1)  # 开始监听
         print(f"服务器已启动，等待连接...")
-        self.connection, addr = self.sock.accept()  # 接受客户端连接  （三次握手完成）
+        connection, addr = self.sock.accept()  # 接受客户端连接  （三次握手完成）
         print(f"客户端已连接: {addr}")
+        self.attach(connection)
         self.start_receive_thread()
 # 连接服务器
     def connect_to_server(self):
-        self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)  # 套接字
-        self.sock.connect((self.host, self.port))      # 连接服务器（发起三次握手）
+        self.sock = socket.create_connection((self.host, self.port))      # 连接服务器（发起三次握手）
         print("已连接到服务器")
-        self.connection = self.sock
+        self.attach(self.sock)
         self.start_receive_thread()
+
+    def attach(self, connection):
+        """使用新的连接：设置超时，先发送hello（观战时发送watch），断线期间排队的消息跟在后面"""
+        connection.settimeout(TIMEOUT)
+        if self.spectate:
+            greeting = {'type': 'watch', 'room': self.watch_room}
+        else:
+            greeting = hello_message(self.game.move_history, self.game_id, self.session)
+        with self.send_lock:
+            self.outbox.insert(0, greeting)
+            self.connection = connection
+
+    def reconnect(self) -> bool:
+        """断线后重新连接（服务端重新等待连接），成功返回True"""
+        with self.send_lock:
+            connection, self.connection = self.connection, None
+        if connection is not None:
+            connection.close()
+        print("连接断开，正在重连...")
+        give_up = time.time() + RECONNECT_TIMEOUT
+        while self.running and time.time() < give_up:
+            try:
+                if self.is_server:
+                    self.sock.settimeout(1.0)
+                    connection, addr = self.sock.accept()
+                else:
+                    connection = self.sock = socket.create_connection((self.host, self.port), timeout=1.0)
+            except OSError:
+                time.sleep(0.5)  # 服务端accept已等待1秒，客户端连接失败时稍后再试
+                continue
+            print("已重新连接")
+            self.attach(connection)
+            return True
+        print("重连失败")
+        return False
 # 新启动一个线程来接受网络消息，防止界面阻塞主线程
     def start_receive_thread(self):
         threading.Thread(target=self.receive_messages, daemon=True).start()
 
     def receive_messages(self):
         while self.running:
+            decoder = FrameDecoder()  # TCP可能把多个消息合成一段，或把一个消息拆成几段
             try:
-                data = self.connection.recv(1024).decode('utf-8')
-                if not data:
-                    break
-
-                message = json.loads(data)
-                self.handle_message(message)
-            except Exception as e:
+                while self.running:
+                    messages = recv_messages(self.connection, decoder)
+                    if messages is None:
+                        break
+                    for message in messages:
+                        self.handle_message(message)
+            except socket.timeout:
+                print("连接超时")
+            except (OSError, ProtocolError) as e:
                 print(f"接收错误: {e}")
+            if not self.running or self.peer_left or not self.reconnect():
                 break
+
+    def update_turn(self):
+        self.my_turn = (not self.spectate and not self.game.game_over and
+                        self.game.current_player == self.player)
 # 落子信息（包含行列坐标）
     def handle_message(self, message):
         if message['type'] == 'move':
+            seq = message.get('seq')
+            history = self.game.move_history
+            if seq is not None and seq < len(history):
+                return  # 重复的落子
+            if seq is not None and seq > len(history):
+                self.queue(hello_message(history, self.game_id))  # 中间有丢失，请求补发
+                return
             row, col = message['move']
             self.game.make_move(row, col)
-            self.my_turn = True
+            self.update_turn()
         elif message['type'] == 'reset':
+            game_id = message.get('game', self.game_id + 1)
+            if game_id <= self.game_id:
+                return  # 已经重置过（双方同时重置或重复消息）
+            self.game_id = game_id
             self.game.reset_game()
-            self.my_turn = self.is_server
+            self.update_turn()
+        elif message['type'] == 'start':  # 多房间服务器配对成功，分配颜色
+            self.player = message['player']
+            self.session = message.get('session')
+            self.game_id = 0
+            self.game.reset_game()
+            self.update_turn()
+            print(f"进入房间{message.get('room')}，执{'黑' if self.player == GomokuGame.BLACK else '白'}")
+        elif message['type'] == 'sync':  # 以服务器的棋局为准
+            self.game.reset_game()
+            for row, col in message['moves']:
+                self.game.make_move(row, col)
+            self.update_turn()
+        elif message['type'] == 'resume':  # 重连后补发的落子
+            if apply_moves(self.game, message['seq'], message['moves']) is None:
+                self.queue(hello_message(self.game.move_history, self.game_id))
+            self.update_turn()
+        elif message['type'] == 'hello':
+            for reply in resume_messages(self.game.move_history, self.game_id,
+                                         message.get('game', 0), message.get('seq', 0)):
+                self.queue(reply)
+        elif message['type'] == 'ping':
+            self.queue({'type': 'pong'})
+        elif message['type'] == 'leave':
+            print("对局已结束" if self.spectate else "对手已离开，等待新的对手...")
+            self.peer_left = self.session is None and not self.spectate
+            self.game.reset_game()
+            self.my_turn = False
+        elif message['type'] == 'watch':
+            print(f"正在观看房间{message['room']}")
+        elif message['type'] == 'rooms':
+            print(f"房间不存在，当前房间: {message['rooms']}")
 
-    def send_move(self, row, col):
-        if not self.connection:
-            return
+    def queue(self, message):
+        with self.send_lock:
+            self.outbox.append(message)
 
+    def send_move(self, row, col):
+        # 断线期间也放入队列：重连后对方按序号丢弃重复的落子
         message = {
             'type': 'move',
-            'move': (row, col)
+            'move': (int(row), int(col)),
+            'seq': len(self.game.move_history) - 1  # 调用前已在本地落子
         }
-        self.connection.send(json.dumps(message).encode('utf-8'))
+        self.queue(message)
         self.my_turn = False
 
     def send_reset(self):
-        if not self.connection:
-            return
+        self.game_id += 1
+        message = {'type': 'reset', 'game': self.game_id}
+        self.queue(message)
 
-        message = {'type': 'reset'}
-        self.connection.send(json.dumps(message).encode('utf-8'))
+    def flush(self):
+        """把本帧产生的所有消息编码到一块，一次sendall发出；空闲超过HEARTBEAT时发送心跳"""
+        with self.send_lock:
+            connection = self.connection
+            if connection is None:
+                return
+            if not self.outbox:
+                if time.time() - self.last_sent < HEARTBEAT:
+                    return
+                self.outbox.append({'type': 'ping'})
+            data = encode_batch(self.outbox, self.binary)
+            self.outbox = []
+            self.last_sent = time.time()
+        try:
+            connection.sendall(data)
+        except OSError as e:
+            print(f"发送错误: {e}")  # 接收线程会发现断线并重连，丢失的落子在重连后补发
 
     def run(self):
         if self.is_server:
@@ -103,21 +231,37 @@ class NetworkGame:
                             self.send_move(row, col)
 
                 if event.type == pygame.KEYDOWN:
-                    if event.key == pygame.K_r:  # 重置游戏
+                    if event.key == pygame.K_r and not self.spectate:  # 重置游戏
                         self.game.reset_game()
-                        if self.is_server:
-                            self.my_turn = True
-                        else:
-                            self.my_turn = False
+                        self.update_turn()
                         self.send_reset()
                     elif event.key == pygame.K_ESCAPE:
                         self.running = False
 
+            self.flush()
             self.renderer.render()
             clock.tick(60)
 
+        if not self.spectate:
+            self.queue({'type': 'leave'})  # 主动退出，对方不必等待重连
+            self.flush()
         if self.connection:
             self.connection.close()
         if self.sock:
             self.sock.close()
-        pygame.quit()
\ No newline at end of file
+        pygame.quit()
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="联网对战")
+    parser.add_argument('--host', default="127.0.0.1")
+    parser.add_argument('--port', type=int, default=None, help="默认对局5555，观战5557")
+    parser.add_argument('--server', action='store_true', help="创建房间（点对点对战）")
+    parser.add_argument('--watch', nargs='?', type=int, const=-1, default=None,
+                        help="观战，可指定房间号（不指定时观看最新的房间）")
+    args = parser.parse_args()
+    spectate = args.watch is not None
+    port = args.port or (5557 if spectate else 5555)
+    room = args.watch if spectate and args.watch >= 0 else None
+    NetworkGame(args.server, args.host, port, watch_room=room, spectate=spectate).run()
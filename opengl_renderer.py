@@ -9,8 +9,15 @@ import tkinter_part
 '''
 用于游戏本体的渲染：
 包含棋盘、棋子、按键，以及一些提示文字和落子点是否超出棋盘边界
+批量绘制：
+1.棋盘（背景、网格线、星位）不会变化，第一次绘制时编译成显示列表，之后每帧只调用一次glCallList
+2.圆只在初始化时计算一次单位圆的顶点（cos/sin），画圆时只做平移和缩放
+3.同色棋子的三角形合并成一个顶点数组，每种颜色一次glDrawArrays；顶点数组只在棋局变化时重建，
+  每帧的CPU开销不再随棋子数增长
 '''
 
+CIRCLE_SEGMENTS = 32
+
 
 
 class OpenGLRenderer:
@@ -52,7 +59,31 @@ class OpenGLRenderer:
             'text1':(0.1, 0.1, 0.2, 0.3)
         }
 
+        # 额外的状态提示（如"AI思考中"），为None时不显示
+        self.status_text = None
+
+        # 单位圆：扇形（圆心+圆周33个点）和三角形列表（每个三角形为圆心和相邻两个圆周点）
+        angles = 2 * np.pi * np.arange(CIRCLE_SEGMENTS + 1) / CIRCLE_SEGMENTS
+        rim = np.stack([np.cos(angles), np.sin(angles)], axis=1).astype(np.float32)
+        self.circle_fan = np.vstack([np.zeros((1, 2), dtype=np.float32), rim])
+        triangles = np.zeros((CIRCLE_SEGMENTS, 3, 2), dtype=np.float32)
+        triangles[:, 1] = rim[:-1]
+        triangles[:, 2] = rim[1:]
+        self.circle_triangles = triangles.reshape(-1, 2)
+        self.board_list = None  # 棋盘的显示列表，第一次绘制时编译
+        self.stone_key = None  # 生成stone_vertices时的棋局（步数, 哈希）
+        self.stone_vertices = {}  # 颜色 -> 该颜色全部棋子的三角形顶点
+
     def draw_board(self):
+        if self.board_list is None:
+            self.board_list = glGenLists(1)
+            glNewList(self.board_list, GL_COMPILE)
+            self.draw_board_geometry()
+            glEndList()
+        glCallList(self.board_list)
+
+    def draw_board_geometry(self):
+        """棋盘的全部绘制命令（编译进显示列表）"""
         # 绘制背景
         glColor4f(*self.colors['background'])
         glBegin(GL_QUADS)
@@ -62,25 +93,18 @@ class OpenGLRenderer:
         glVertex2f(0, self.window_size[1])
         glEnd()
 
-        # 绘制网格线
+        # 绘制网格线：横线和竖线放在同一个GL_LINES中
         glColor4f(*self.colors['grid'])
         glLineWidth(1.5)
-
-        # 横线
-        for i in range(self.board_size):
-            y = self.margin + i * self.cell_size
-            glBegin(GL_LINES)
-            glVertex2f(self.margin, y)
-            glVertex2f(self.margin + (self.board_size - 1) * self.cell_size, y)
-            glEnd()
-
-        # 竖线
+        end = self.margin + (self.board_size - 1) * self.cell_size
+        glBegin(GL_LINES)
         for i in range(self.board_size):
-            x = self.margin + i * self.cell_size
-            glBegin(GL_LINES)
-            glVertex2f(x, self.margin)
-            glVertex2f(x, self.margin + (self.board_size - 1) * self.cell_size)
-            glEnd()
+            offset = self.margin + i * self.cell_size
+            glVertex2f(self.margin, offset)  # 横线
+            glVertex2f(end, offset)
+            glVertex2f(offset, self.margin)  # 竖线
+            glVertex2f(offset, end)
+        glEnd()
 
         # 绘制棋盘上的五个点
         glColor4f(*self.colors['grid'])
@@ -89,27 +113,43 @@ class OpenGLRenderer:
             y = self.margin + point[1] * self.cell_size
             self.draw_circle(x, y, 4)
 
+    def build_stone_vertices(self):
+        """每种颜色的棋子合并为一个三角形顶点数组：(棋子数*32*3, 2)"""
+        board = np.asarray(self.game.get_board())
+        self.stone_vertices = {}
+        for player in (self.game.BLACK, self.game.WHITE):
+            rows, cols = np.nonzero(board == player)
+            if not len(rows):
+                continue
+            centers = np.stack([self.margin + cols * self.cell_size,
+                                self.margin + rows * self.cell_size], axis=1).astype(np.float32)
+            vertices = centers[:, np.newaxis, :] + self.piece_radius * self.circle_triangles[np.newaxis]
+            self.stone_vertices[player] = np.ascontiguousarray(vertices.reshape(-1, 2))
+
     def draw_pieces(self):
-        board = self.game.get_board()
-        for row in range(self.board_size):
-            for col in range(self.board_size):
-                if board[row][col] != self.game.EMPTY:
-                    x = self.margin + col * self.cell_size
-                    y = self.margin + row * self.cell_size
-
-                    if board[row][col] == self.game.BLACK:
-                        glColor4f(*self.colors['black'])
-                    else:
-                        glColor4f(*self.colors['white'])
-
-                    self.draw_circle(x, y, self.piece_radius)
-
-                # 有问题（禁用）
-                    # # 为白棋添加黑色边框
-                    # if board[row][col] == self.game.WHITE:
-                    #     glColor4f(0, 0, 0, 1)
-                    #     glLineWidth(1.0)
-                    #     self.draw_circle(x, y, self.piece_radius, filled=False)
+        # 棋局变化（落子、悔棋、重置）时才重建顶点数组
+        key = (len(self.game.move_history), self.game.hash)
+        if key != self.stone_key:
+            self.build_stone_vertices()
+            self.stone_key = key
+
+        if self.stone_vertices:
+            glEnableClientState(GL_VERTEX_ARRAY)
+            for player, color in ((self.game.BLACK, 'black'), (self.game.WHITE, 'white')):
+                vertices = self.stone_vertices.get(player)
+                if vertices is None:
+                    continue
+                glColor4f(*self.colors[color])
+                glVertexPointer(2, GL_FLOAT, 0, vertices)
+                glDrawArrays(GL_TRIANGLES, 0, len(vertices))
+            glDisableClientState(GL_VERTEX_ARRAY)
+
+        # 有问题（禁用）
+        # # 为白棋添加黑色边框
+        # if board[row][col] == self.game.WHITE:
+        #     glColor4f(0, 0, 0, 1)
+        #     glLineWidth(1.0)
+        #     self.draw_circle(x, y, self.piece_radius, filled=False)
 
         # 绘制最后一步落子的标记
         if self.game.move_history:
@@ -121,13 +161,13 @@ class OpenGLRenderer:
             self.draw_circle(x, y, 5)
 
     def draw_circle(self, x, y, radius, filled=True):
-        segments = 32
-        glBegin(GL_TRIANGLE_FAN if filled else GL_LINE_LOOP)
-        glVertex2f(x, y)
-        for i in range(segments + 1):
-            angle = 2 * np.pi * i / segments
-            glVertex2f(x + radius * np.cos(angle), y + radius * np.sin(angle))
-        glEnd()
+        # 由单位圆平移缩放得到顶点；描边时不需要圆心
+        vertices = self.circle_fan if filled else self.circle_fan[1:]
+        vertices = np.ascontiguousarray(vertices * radius + np.array([x, y], dtype=np.float32))
+        glEnableClientState(GL_VERTEX_ARRAY)
+        glVertexPointer(2, GL_FLOAT, 0, vertices)
+        glDrawArrays(GL_TRIANGLE_FAN if filled else GL_LINE_LOOP, 0, len(vertices))
+        glDisableClientState(GL_VERTEX_ARRAY)
 
     def draw_ui(self):
         # 显示当前玩家信息
@@ -135,6 +175,8 @@ class OpenGLRenderer:
         player_state = f"状态: {'先手回合' if self.game.current_player == self.game.BLACK else '后手回合'}"
         self.render_text(player_text, 600,750 , self.colors['text'])
         self.render_text(player_state, 600, 700, self.colors['text1'])
+        if self.status_text:
+            self.render_text(self.status_text, 30, 750, self.colors['text'])
 
         # 显示游戏状态
         if self.game.game_over:
@@ -0,0 +1,188 @@
+import argparse
+import os
+import struct
+import time
+from typing import Dict, List, Optional, Tuple
+from bitboard import BitBoard, BOARD_SIZE, BLACK, WHITE, iter_positions
+from transposition import ZOBRIST_KEYS, ZOBRIST_SIDE
+
+'''
+开局库：
+1.开局局面在大量对局中反复出现，提前用比在线更深的搜索算好应对，在线时直接查表
+2.利用棋盘的8种对称（4种旋转 x 是否镜像）：所有对称局面取最小的Zobrist哈希作为键，只存一份
+3.文件格式：4字节标识 + 版本 + 最大子数 + 条目数，之后每条9字节（8字节键 + 1字节落子row*15+col）
+4.离线构建：python opening_book.py --plies 4 --replies 3 --depth 5
+'''
+
+MAGIC = b'GMKB'
+VERSION = 1
+HEADER = struct.Struct('<4sBBI')
+ENTRY = struct.Struct('<QB')
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'opening_book.bin')
+
+LAST = BOARD_SIZE - 1
+
+
+def transform(row: int, col: int, symmetry: int) -> Tuple[int, int]:
+    """对称变换：symmetry>=4时先左右镜像，再顺时针旋转symmetry%4次"""
+    if symmetry >= 4:
+        col = LAST - col
+    for _ in range(symmetry % 4):
+        row, col = col, LAST - row
+    return row, col
+
+
+def inverse_transform(row: int, col: int, symmetry: int) -> Tuple[int, int]:
+    """transform的逆变换"""
+    for _ in range(symmetry % 4):
+        row, col = LAST - col, row
+    if symmetry >= 4:
+        col = LAST - col
+    return row, col
+
+
+def canonical_key(board: BitBoard, player: int) -> Tuple[int, int]:
+    """
+    计算局面在8种对称下的最小哈希
+    :param player: 轮到落子的一方
+    :return: (规范键, 取到最小值的对称变换编号)
+    """
+    stones = [list(iter_positions(board.stones[p])) for p in range(2)]
+    side = ZOBRIST_SIDE if player == WHITE else 0
+    best_key, best_symmetry = None, 0
+    for symmetry in range(8):
+        key = side
+        for p in range(2):
+            keys = ZOBRIST_KEYS[p]
+            for r, c in stones[p]:
+                tr, tc = transform(r, c, symmetry)
+                key ^= keys[tr * BOARD_SIZE + tc]
+        if best_key is None or key < best_key:
+            best_key, best_symmetry = key, symmetry
+    return best_key, best_symmetry
+
+
+class OpeningBook:
+    """
+    规范键 -> 规范坐标系下的落子
+    """
+
+    def __init__(self, max_stones: int = 0):
+        """
+        :param max_stones: 库中局面的最大棋子数，超过时不必计算键
+        """
+        self.entries: Dict[int, int] = {}
+        self.max_stones = max_stones
+
+    def __len__(self):
+        return len(self.entries)
+
+    def add(self, board: BitBoard, player: int, move: Tuple[int, int]):
+        key, symmetry = canonical_key(board, player)
+        row, col = transform(move[0], move[1], symmetry)
+        self.entries[key] = row * BOARD_SIZE + col
+        self.max_stones = max(self.max_stones, board.count)
+
+    def lookup(self, board: BitBoard, player: int) -> Optional[Tuple[int, int]]:
+        """查找当前局面的库内应对，没有时返回None"""
+        if board.count > self.max_stones or not self.entries:
+            return None
+        key, symmetry = canonical_key(board, player)
+        pos = self.entries.get(key)
+        if pos is None:
+            return None
+        return inverse_transform(pos // BOARD_SIZE, pos % BOARD_SIZE, symmetry)
+
+    def save(self, path: str = DEFAULT_PATH):
+        with open(path, 'wb') as f:
+            f.write(HEADER.pack(MAGIC, VERSION, self.max_stones, len(self.entries)))
+            for key in sorted(self.entries):
+                f.write(ENTRY.pack(key, self.entries[key]))
+
+    @classmethod
+    def load(cls, path: str = DEFAULT_PATH) -> 'OpeningBook':
+        with open(path, 'rb') as f:
+            data = f.read()
+        magic, version, max_stones, count = HEADER.unpack_from(data)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"不是有效的开局库文件: {path}")
+        book = cls(max_stones)
+        for key, pos in ENTRY.iter_unpack(data[HEADER.size:HEADER.size + count * ENTRY.size]):
+            book.entries[key] = pos
+        return book
+
+
+_default_book = None
+
+
+def default_book() -> OpeningBook:
+    """加载随程序发布的开局库（每个进程只读一次文件，文件不存在时为空库）"""
+    global _default_book
+    if _default_book is None:
+        _default_book = OpeningBook.load() if os.path.exists(DEFAULT_PATH) else OpeningBook()
+    return _default_book
+
+
+def build_book(plies: int = 4, replies: int = 3, depth: int = 5, width: Optional[int] = 12,
+               time_limit: Optional[float] = None, verbose: bool = True) -> OpeningBook:
+    """
+    离线构建开局库：从空棋盘开始按层展开，每个局面用比在线更深的搜索求出最佳应对
+    展开时除了最佳应对，还加入走法排序靠前的replies个走法，覆盖对手常见的下法
+    :param plies: 展开的总步数
+    :param replies: 每个局面展开的走法数
+    :param depth: 搜索深度（设置time_limit时为迭代加深上限）
+    :param width: 非根节点的搜索宽度
+    """
+    from game_core import GomokuGame
+    from ai_player import AIPlayer
+
+    book = OpeningBook()
+    seen = set()
+    frontier: List[List[Tuple[int, int]]] = [[]]
+    game = GomokuGame()
+    for ply in range(plies):
+        next_frontier = []
+        for moves in frontier:
+            game.reset_game()
+            for row, col in moves:
+                game.make_move(row, col)
+            player = game.current_player
+            ai = AIPlayer(game, player, debug_mode=False)
+            ai.use_opening_book = False
+            ai.max_depth = depth
+            ai.max_width = width
+            if time_limit is not None:
+                ai.time_limit = time_limit
+                ai.max_deepening_depth = depth
+            start = time.perf_counter()
+            best = ai.find_best_move()
+            book.add(ai.board, player, best)
+            if verbose:
+                print(f"[开局库] 第{ply + 1}步 {moves} -> {best} ({time.perf_counter() - start:.2f}s)")
+
+            # 子局面：最佳应对 + 排序靠前的其他走法（对称的子局面只保留一个）
+            candidates = [best] + [move for move in ai.get_possible_moves(player) if move != best]
+            for move in candidates[:replies]:
+                ai.board.place(move[0], move[1], player)
+                key = canonical_key(ai.board, WHITE if player == BLACK else BLACK)[0]
+                ai.board.remove(move[0], move[1], player)
+                if key not in seen:
+                    seen.add(key)
+                    next_frontier.append(moves + [move])
+        frontier = next_frontier
+    return book
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="离线构建开局库")
+    parser.add_argument('--plies', type=int, default=4, help="展开的总步数")
+    parser.add_argument('--replies', type=int, default=3, help="每个局面展开的走法数")
+    parser.add_argument('--depth', type=int, default=5, help="搜索深度")
+    parser.add_argument('--width', type=int, default=12, help="非根节点搜索宽度（0为不限）")
+    parser.add_argument('--time-limit', type=float, default=None, help="每个局面的思考时间（秒）")
+    parser.add_argument('--out', default=DEFAULT_PATH, help="输出文件")
+    args = parser.parse_args()
+
+    result = build_book(args.plies, args.replies, args.depth, args.width or None, args.time_limit)
+    result.save(args.out)
+    print(f"[开局库] 共{len(result)}个局面，已保存到 {args.out}")
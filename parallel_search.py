@@ -0,0 +1,223 @@
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from typing import Dict, List, Optional, Tuple
+from bitboard import BitBoard
+from transposition import EXACT, TranspositionTable
+
+'''
+多核根节点并行搜索：
+1.根节点第一手（主要变例）在本进程先搜完，得到alpha；其余根走法以(alpha, +inf)窗口分发到进程池
+2.按原顺序取第一个严格大于当前最佳的分数，与串行Alpha-Beta选出的走法一致
+3.棋盘以BitBoard.to_bytes()的60字节传给子进程，AI参数只在进程初始化时传一次
+4.设置node_limit时剩余节点平分给分发出去的根走法，整步的节点数不超过上限
+5.子进程共享一个停止事件，超时/取消时中断（与截止时间一样每256个节点查询一次，跨进程查询需要加锁）
+'''
+
+_worker_ai = None
+_worker_search_id = None
+
+
+def _init_worker(config: Dict, stop_event):
+    """子进程初始化：按配置构造一个只用于搜索的AIPlayer"""
+    global _worker_ai
+    from game_core import GomokuGame
+    from ai_player import AIPlayer
+    # 根局面由任务以字节形式传入，这里的game只提供颜色常量
+    _worker_ai = AIPlayer(GomokuGame(), config['player'], debug_mode=False)
+    for name, value in config.items():
+        setattr(_worker_ai, name, value)
+    _worker_ai.cancel_event = stop_event
+
+
+def _ping() -> int:
+    return os.getpid()
+
+
+def _search_move(search_id: int, board_bytes: bytes, move: Tuple[int, int], depth: int, alpha: float,
+                 time_left: Optional[float], node_limit: Optional[int]) -> Tuple[Tuple[int, int], Optional[float], int]:
+    """
+    子进程任务：在根局面上落下move后，以(alpha, +inf)窗口搜索depth-1层
+    :return: (走法, 分数（被中断时为None）, 节点数)
+    """
+    from ai_player import SearchAborted
+    global _worker_search_id
+    ai = _worker_ai
+    if search_id != _worker_search_id:
+        # 新的一次find_best_move：清空置换表等，保证结果只取决于当前局面
+        _worker_search_id = search_id
+        ai.transposition_table.clear()
+        ai.move_orderer.new_search()
+    ai.load_board(BitBoard.from_bytes(board_bytes))
+    ai.nodes = 0
+    ai.node_limit = node_limit
+    ai.deadline = time.perf_counter() + time_left if time_left is not None else None
+    ai.search_depth = depth
+    ai.place_stone(move[0], move[1], ai.player)
+    try:
+        score = ai.minimax(depth - 1, alpha, float('inf'), False, move)
+    except SearchAborted:
+        score = None
+    return move, score, ai.nodes
+
+
+class ParallelRootSearch:
+    """
+    进程池形式的根节点并行搜索，替换AIPlayer.search_root
+    """
+
+    def __init__(self, workers: Optional[int] = None):
+        """
+        :param workers: 进程数，默认为CPU核数
+        """
+        self.workers = workers or os.cpu_count() or 1
+        self.executor = None
+        self.stop_event = None
+        self.config = None
+        self.search_id = 0
+
+    def worker_config(self, ai) -> Dict:
+        """需要同步到子进程的AI参数"""
+        return {
+            'player': ai.player,
+            'max_depth': ai.max_depth,
+            'expand_radius': ai.expand_radius,
+            'max_width': ai.max_width,
+            'pattern_scores': dict(ai.pattern_scores),
+        }
+
+    def ensure_pool(self, ai):
+        """按需创建进程池，AI参数变化时重建"""
+        config = self.worker_config(ai)
+        if self.executor is not None and config == self.config:
+            return
+        self.close()
+        self.stop_event = multiprocessing.Event()
+        self.executor = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                            initargs=(config, self.stop_event))
+        self.config = config
+
+    def warm_up(self, ai):
+        """提前启动所有子进程（计时对比时排除进程启动开销）"""
+        self.ensure_pool(ai)
+        for future in [self.executor.submit(_ping) for _ in range(self.workers)]:
+            future.result()
+
+    def new_search(self):
+        """每次find_best_move开始时调用，子进程据此清空置换表"""
+        self.search_id += 1
+
+    def search_root(self, ai, moves: List[Tuple[int, int]], depth: int) -> Tuple[Optional[Tuple[int, int]], float]:
+        """
+        与AIPlayer.search_root相同的接口和结果
+        """
+        from ai_player import SearchAborted
+        self.ensure_pool(ai)
+        self.stop_event.clear()
+        ai.root_best = None
+        ai.search_depth = depth
+
+        key = ai.position_key(True)
+        entry = ai.transposition_table.probe(key)
+        first = ai.pv_table.get(key) or (entry[4] if entry is not None else None)
+        if first in moves:
+            moves = [first] + [move for move in moves if move != first]
+
+        # 第一手在本进程搜索，得到后续走法的alpha
+        best_move = moves[0]
+        ai.place_stone(best_move[0], best_move[1], ai.player)
+        best_score = ai.minimax(depth - 1, -float('inf'), float('inf'), False, best_move)
+        ai.remove_stone(best_move[0], best_move[1], ai.player)
+        ai.root_best = (best_move, best_score)
+        if ai.trace_hook is not None:
+            ai.emit('root_move', move=best_move, score=best_score, depth=depth)
+
+        board_bytes = ai.board.to_bytes()
+        time_left = ai.deadline - time.perf_counter() if ai.deadline is not None else None
+        node_limit = None
+        if ai.node_limit is not None:
+            # 剩余节点平分给各个子任务，node_limit仍然是整步的上限（某个走法用完自己的份额时本轮中断）
+            node_limit = max(ai.node_limit - ai.nodes, 0) // max(len(moves) - 1, 1)
+        futures = [
+            self.executor.submit(_search_move, self.search_id, board_bytes, move, depth, best_score,
+                                 time_left, node_limit)
+            for move in moves[1:]
+        ]
+        scores = {}
+        pending = set(futures)
+        try:
+            while pending:
+                done, pending = wait(pending, timeout=0.05, return_when=FIRST_COMPLETED)
+                for future in done:
+                    move, score, nodes = future.result()
+                    ai.nodes += nodes
+                    if score is None:
+                        raise SearchAborted()
+                    scores[move] = score
+                if ai.cancel_event is not None and ai.cancel_event.is_set():
+                    raise SearchAborted()
+                if ai.deadline is not None and time.perf_counter() >= ai.deadline:
+                    raise SearchAborted()
+        except SearchAborted:
+            self.stop_event.set()
+            for future in pending:
+                future.cancel()
+            raise
+
+        # 按原顺序比较，严格大于才替换，与串行搜索的选择规则一致
+        for move in moves[1:]:
+            score = scores[move]
+            if ai.trace_hook is not None:
+                ai.emit('root_move', move=move, score=score, depth=depth)
+            if score > best_score:
+                best_score = score
+                best_move = move
+                ai.root_best = (best_move, best_score)
+
+        ai.transposition_table.store(key, depth, EXACT, best_score, best_move)
+        return best_move, best_score
+
+    def close(self):
+        if self.executor is not None:
+            if self.stop_event is not None:
+                self.stop_event.set()
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+
+
+def compare_with_serial(ai, workers: Optional[int] = None) -> Dict:
+    """
+    以相同深度分别做串行和并行搜索（都从空置换表开始），报告加速比以及最佳走法是否一致
+    威胁空间搜索两种模式相同，这里关闭以只比较Minimax部分
+    设置了max_width时裁剪依赖历史表，两种模式搜索的走法集合可能不同，结果不保证一致
+    """
+    saved = (ai.parallel_workers, ai.use_threat_search, ai.debug_mode, ai.transposition_table)
+    ai.use_threat_search = False
+    ai.debug_mode = False
+    result = {}
+    workers = workers or os.cpu_count() or 1
+    try:
+        for label, parallel in (('serial', None), ('parallel', workers)):
+            ai.parallel_workers = parallel
+            if parallel:
+                if ai.parallel_search is None or ai.parallel_search.workers != parallel:
+                    ai.close()
+                    ai.parallel_search = ParallelRootSearch(parallel)
+                ai.parallel_search.warm_up(ai)
+            ai.transposition_table = TranspositionTable(saved[3].size)
+            ai.move_orderer.killers = {}
+            ai.move_orderer.history = [[0] * len(table) for table in ai.move_orderer.history]
+            start = time.perf_counter()
+            move = ai.find_best_move()
+            result[f'{label}_time'] = time.perf_counter() - start
+            result[f'{label}_move'] = move
+            result[f'{label}_nodes'] = ai.nodes
+    finally:
+        ai.parallel_workers, ai.use_threat_search, ai.debug_mode, ai.transposition_table = saved
+        if not ai.parallel_workers:
+            ai.close()
+    result['workers'] = workers
+    result['speedup'] = result['serial_time'] / result['parallel_time'] if result['parallel_time'] else 0.0
+    result['identical'] = result['serial_move'] == result['parallel_move']
+    return result
@@ -0,0 +1,56 @@
+from typing import Dict, List, Optional, Tuple
+
+'''
+整数下标的棋型评分表：
+1.五格棋型（pattern_scores中长度为5的键，如"BBB00"）：黑白各一张32项的表，下标为该方棋子的5位掩码
+  窗口内同时有双方棋子时不计分
+2.六格棋型（长度为6的键，如活三"0BBB00"、眠三"WBBB00"）：一张4096项的表，每格2位编码，
+  下标为 黑棋6位掩码 | 白棋6位掩码<<6，按窗口内容精确匹配，可以表达两端的空位或对方棋子
+3.掩码的第k位对应棋型字符串的第k个字符
+4.同一套评分只生成一次（按内容缓存），每次搜索不再拼接字符串查字典；没有六格棋型时不产生任何额外开销
+'''
+
+SIX = 6
+SIX_CODES = 1 << (2 * SIX)
+
+_cache: Dict[Tuple, Tuple[List[int], List[int], Optional[List[int]]]] = {}
+
+
+def _pattern_mask(pattern: str, stone: str) -> int:
+    """棋型字符串中stone所在位置的掩码"""
+    mask = 0
+    for k, char in enumerate(pattern):
+        if char == stone:
+            mask |= 1 << k
+    return mask
+
+
+def _build(pattern_scores: Dict[str, int]) -> Tuple[List[int], List[int], Optional[List[int]]]:
+    black_table = [0] * 32
+    white_table = [0] * 32
+    six_table = None
+    for pattern, score in pattern_scores.items():
+        black = _pattern_mask(pattern, 'B')
+        white = _pattern_mask(pattern, 'W')
+        if len(pattern) == 5:
+            # 与原来的字符串匹配一致：只有一方棋子的五格棋型才会被匹配到
+            if black and not white:
+                black_table[black] = score
+            elif white and not black:
+                white_table[white] = score
+        elif len(pattern) == SIX:
+            if six_table is None:
+                six_table = [0] * SIX_CODES
+            six_table[black | (white << SIX)] = score
+    return black_table, white_table, six_table
+
+
+def pattern_tables(pattern_scores: Dict[str, int]) -> Tuple[List[int], List[int], Optional[List[int]]]:
+    """
+    :return: (黑棋五格表, 白棋五格表, 六格表（没有六格棋型时为None）)，相同内容的pattern_scores返回同一组表
+    """
+    key = tuple(sorted(pattern_scores.items()))
+    tables = _cache.get(key)
+    if tables is None:
+        tables = _cache[key] = _build(pattern_scores)
+    return tables
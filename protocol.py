@@ -0,0 +1,202 @@
+import json
+import struct
+from typing import Dict, Iterable, List, Optional
+
+'''
+联机通信协议（TCP是字节流，需要自己划分消息边界）：
+1.每个消息为一帧：2字节长度（大端，不含自身） + 负载
+2.负载第1字节为类型：
+  MSG_JSON  后面是UTF-8编码的JSON对象（通用消息）
+  MSG_MOVE   后面是1字节落子 row*15+col（一步棋整帧只有4字节），带序号时再加1字节序号
+  MSG_RESET  没有后续内容
+  MSG_SYNC   后面每步落子1字节（整局快照，225步也只有228字节）
+  MSG_PING/MSG_PONG 心跳，没有后续内容
+  MSG_RESUME 1字节起始序号 + 每步落子1字节（断线重连时只补发缺少的后缀）
+3.FrameDecoder缓存不完整的帧：一次recv收到多个消息或半个消息都能正确还原
+4.encode_batch把多个消息拼成一块，调用一次sendall发出
+5.落子序号即该步在move_history中的下标：序号小于本地步数是重复消息，大于本地步数说明中间有丢失
+  每局（重置一次算一局）有局号；重连后双方交换hello（局号+步数），落后的一方收到缺少的后缀，
+  局号落后时先收到reset再收到整局
+'''
+
+HEADER = struct.Struct('!H')
+MAX_PAYLOAD = 0xFFFF
+BOARD_SIZE = 15
+
+MSG_JSON = 0
+MSG_MOVE = 1
+MSG_RESET = 2
+MSG_SYNC = 3
+MSG_PING = 4
+MSG_PONG = 5
+MSG_RESUME = 6
+
+HEARTBEAT = 2.0  # 秒，空闲超过该时间发送一次心跳
+TIMEOUT = 6.0  # 秒，超过该时间没有收到任何消息视为断线
+
+
+class ProtocolError(Exception):
+    """收到无法解析的帧"""
+
+
+def encode_payload(message: Dict, binary: bool = True) -> bytes:
+    """
+    消息字典 -> 负载
+    :param binary: 为True时落子和重置使用紧凑的二进制编码，否则一律使用JSON
+    """
+    kind = message.get('type')
+    if binary and kind == 'move' and len(message) == 2:
+        row, col = message['move']
+        return bytes((MSG_MOVE, int(row) * BOARD_SIZE + int(col)))
+    if binary and kind == 'move' and len(message) == 3 and 0 <= message.get('seq', -1) < 256:
+        row, col = message['move']
+        return bytes((MSG_MOVE, int(row) * BOARD_SIZE + int(col), message['seq']))
+    if binary and kind == 'reset' and len(message) == 1:
+        return bytes((MSG_RESET,))
+    if binary and kind == 'sync' and len(message) == 2:
+        return bytes((MSG_SYNC,)) + bytes(int(row) * BOARD_SIZE + int(col) for row, col in message['moves'])
+    if binary and kind in ('ping', 'pong') and len(message) == 1:
+        return bytes((MSG_PING if kind == 'ping' else MSG_PONG,))
+    if binary and kind == 'resume' and len(message) == 3 and 0 <= message['seq'] < 256:
+        return bytes((MSG_RESUME, message['seq'])) + bytes(int(row) * BOARD_SIZE + int(col)
+                                                           for row, col in message['moves'])
+    return bytes((MSG_JSON,)) + json.dumps(message, separators=(',', ':')).encode('utf-8')
+
+
+def decode_payload(payload: bytes) -> Dict:
+    """负载 -> 消息字典（落子统一为 {'type': 'move', 'move': (row, col)}）"""
+    if not payload:
+        raise ProtocolError("空消息")
+    kind = payload[0]
+    if kind == MSG_MOVE:
+        if len(payload) not in (2, 3) or payload[1] >= BOARD_SIZE * BOARD_SIZE:
+            raise ProtocolError(f"非法落子消息: {payload!r}")
+        message = {'type': 'move', 'move': divmod(payload[1], BOARD_SIZE)}
+        if len(payload) == 3:
+            message['seq'] = payload[2]
+        return message
+    if kind == MSG_RESET:
+        return {'type': 'reset'}
+    if kind == MSG_SYNC:
+        if any(index >= BOARD_SIZE * BOARD_SIZE for index in payload[1:]):
+            raise ProtocolError(f"非法快照消息: {payload!r}")
+        return {'type': 'sync', 'moves': [divmod(index, BOARD_SIZE) for index in payload[1:]]}
+    if kind in (MSG_PING, MSG_PONG) and len(payload) == 1:
+        return {'type': 'ping' if kind == MSG_PING else 'pong'}
+    if kind == MSG_RESUME:
+        if len(payload) < 2 or any(index >= BOARD_SIZE * BOARD_SIZE for index in payload[2:]):
+            raise ProtocolError(f"非法续传消息: {payload!r}")
+        return {'type': 'resume', 'seq': payload[1], 'moves': [divmod(index, BOARD_SIZE) for index in payload[2:]]}
+    if kind == MSG_JSON:
+        try:
+            message = json.loads(payload[1:].decode('utf-8'))
+        except (UnicodeDecodeError, ValueError) as e:
+            raise ProtocolError(f"JSON解析失败: {e}")
+        if not isinstance(message, dict):
+            raise ProtocolError("消息必须是JSON对象")
+        if message.get('type') == 'move' and isinstance(message.get('move'), list):
+            message['move'] = tuple(message['move'])
+        return message
+    raise ProtocolError(f"未知消息类型: {kind}")
+
+
+def hello_message(move_history: List, game_id: int, session: Optional[str] = None) -> Dict:
+    """重连握手：告诉对方本地的局号和步数"""
+    message = {'type': 'hello', 'game': game_id, 'seq': len(move_history)}
+    if session is not None:
+        message['session'] = session
+    return message
+
+
+def resume_messages(move_history: List, game_id: int, peer_game: int, peer_seq: int) -> List[Dict]:
+    """
+    收到对方的hello后，需要发给对方的消息
+    对方落后时补发缺少的后缀（局号落后时先reset再发整局）；对方领先时回一个hello，由对方补发
+    """
+    if peer_game > game_id:
+        return [hello_message(move_history, game_id)]
+    if peer_game < game_id:
+        return [{'type': 'reset', 'game': game_id},
+                {'type': 'resume', 'seq': 0, 'moves': list(move_history)}]
+    if peer_seq < len(move_history):
+        return [{'type': 'resume', 'seq': peer_seq, 'moves': move_history[peer_seq:]}]
+    if peer_seq > len(move_history):
+        return [hello_message(move_history, game_id)]
+    return []
+
+
+def apply_moves(game, seq: int, moves: List, player: Optional[int] = None) -> Optional[int]:
+    """
+    把从序号seq开始的落子应用到game上，已有的步数跳过
+    :param player: 给出时只接受该方的落子（服务器校验客户端补发的后缀）
+    :return: 新应用的步数；seq大于本地步数（中间有缺失）时返回None
+    """
+    if seq > len(game.move_history):
+        return None
+    applied = 0
+    for index, (row, col) in enumerate(moves, seq):
+        if index < len(game.move_history):
+            continue  # 重复
+        if player is not None and game.current_player != player:
+            break
+        if not game.make_move(int(row), int(col)):
+            break
+        applied += 1
+    return applied
+
+
+def frame(payload: bytes) -> bytes:
+    """加上长度前缀"""
+    if len(payload) > MAX_PAYLOAD:
+        raise ProtocolError(f"消息过长: {len(payload)}字节")
+    return HEADER.pack(len(payload)) + payload
+
+
+def encode(message: Dict, binary: bool = True) -> bytes:
+    """编码单个消息（完整的一帧）"""
+    return frame(encode_payload(message, binary))
+
+
+def encode_batch(messages: Iterable[Dict], binary: bool = True) -> bytes:
+    """把多个消息编码到一块，一次sendall发出"""
+    return b''.join(encode(message, binary) for message in messages)
+
+
+class FrameDecoder:
+    """
+    增量解码：feed()收到的任意字节片段，返回其中已经完整的消息
+    """
+
+    def __init__(self):
+        self.buffer = bytearray()
+
+    def feed(self, data: bytes) -> List[Dict]:
+        self.buffer += data
+        messages = []
+        offset = 0
+        buffer = self.buffer
+        while len(buffer) - offset >= HEADER.size:
+            (length,) = HEADER.unpack_from(buffer, offset)
+            end = offset + HEADER.size + length
+            if end > len(buffer):
+                break  # 帧还没收全
+            messages.append(decode_payload(bytes(buffer[offset + HEADER.size:end])))
+            offset = end
+        if offset:
+            del buffer[:offset]
+        return messages
+
+    def pending(self) -> int:
+        """缓存中尚未组成完整帧的字节数"""
+        return len(self.buffer)
+
+
+def recv_messages(sock, decoder: FrameDecoder, bufsize: int = 4096) -> Optional[List[Dict]]:
+    """
+    阻塞读取一次套接字
+    :return: 本次收到的完整消息（可能为空列表），连接关闭时返回None
+    """
+    data = sock.recv(bufsize)
+    if not data:
+        return None
+    return decoder.feed(data)
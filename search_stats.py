@@ -0,0 +1,115 @@
+import cProfile
+import io
+import pstats
+from typing import Dict, List, Optional, Tuple
+
+'''
+搜索统计与跟踪：
+1.SearchStats记录一次find_best_move的计数：节点、叶子评估、按层统计的剪枝、置换表命中、每层耗时、有效分支因子
+2.AIPlayer.collect_stats为False且没有trace_hook时不创建统计对象，搜索中只多一次None判断
+3.跟踪事件（开局库、威胁搜索、根节点候选、每层完成、最终结果）交给trace_hook，debug_mode时打印除根节点候选以外的事件
+4.profile_call用cProfile包装一次调用并生成文本报告（"分析这一步"）
+'''
+
+# debug_mode打印的事件；根节点每个候选走法的'root_move'只交给trace_hook，避免刷屏
+DEBUG_EVENTS = ('book', 'threat_win', 'threat_defense', 'depth', 'result')
+
+
+class SearchStats:
+    """
+    一次find_best_move的统计
+    """
+
+    def __init__(self):
+        self.nodes = 0  # Minimax节点数（含根节点以下所有节点）
+        self.leaf_evals = 0  # 到达深度0或满盘时的局面评估次数
+        self.interior_nodes = 0  # 展开了子节点的内部节点数
+        self.moves_searched = 0  # 内部节点实际搜索的子节点总数（剪枝后）
+        self.cutoffs: Dict[int, int] = {}  # 距根节点的层数 -> Alpha-Beta剪枝次数
+        self.tt_probes = 0
+        self.tt_hits = 0  # 置换表中有该局面
+        self.tt_cutoffs = 0  # 置换表结果直接返回（无需搜索）
+        self.depth_times: List[Tuple[int, float, int]] = []  # (深度, 耗时, 累计节点数)
+        self.threat_time = 0.0  # 根节点威胁空间搜索耗时
+        self.book_hit = False
+        self.move: Optional[Tuple[int, int]] = None
+        self.score = None
+        self.depth = 0
+        self.time = 0.0
+
+    def record_cutoff(self, ply: int):
+        self.cutoffs[ply] = self.cutoffs.get(ply, 0) + 1
+
+    def branching_factor(self) -> float:
+        """有效分支因子：每个内部节点平均搜索的子节点数"""
+        return self.moves_searched / self.interior_nodes if self.interior_nodes else 0.0
+
+    def nps(self) -> float:
+        return self.nodes / self.time if self.time else 0.0
+
+    def to_dict(self) -> Dict:
+        return {
+            'move': self.move,
+            'score': self.score,
+            'depth': self.depth,
+            'time': self.time,
+            'nodes': self.nodes,
+            'nps': self.nps(),
+            'leaf_evals': self.leaf_evals,
+            'branching_factor': self.branching_factor(),
+            'cutoffs': dict(sorted(self.cutoffs.items())),
+            'tt_probes': self.tt_probes,
+            'tt_hits': self.tt_hits,
+            'tt_cutoffs': self.tt_cutoffs,
+            'depth_times': self.depth_times,
+            'threat_time': self.threat_time,
+            'book_hit': self.book_hit,
+        }
+
+    def format(self) -> str:
+        cutoffs = ' '.join(f"{ply}:{count}" for ply, count in sorted(self.cutoffs.items()))
+        depths = ' '.join(f"{depth}:{seconds:.3f}s" for depth, seconds, _ in self.depth_times)
+        return (f"节点 {self.nodes}（{self.nps():.0f}/秒） 叶子评估 {self.leaf_evals} "
+                f"分支因子 {self.branching_factor():.2f} 置换表命中 {self.tt_hits}/{self.tt_probes} "
+                f"（直接返回 {self.tt_cutoffs}） 剪枝[层:次数] {cutoffs or '-'} 每层耗时 {depths or '-'} "
+                f"威胁搜索 {self.threat_time:.3f}s")
+
+
+def format_event(event: str, data: Dict) -> str:
+    """把跟踪事件格式化为debug_mode的输出"""
+    if event == 'book':
+        return f"[开局库] 命中 {data['move']}"
+    if event == 'threat_win':
+        return f"[威胁搜索] 找到强制胜利，落子 {data['move']}"
+    if event == 'threat_defense':
+        return f"[威胁搜索] 对手威胁 {data['threat']}，可防守点 {data['defenses']}"
+    if event == 'depth':
+        pv_text = ' '.join(f"({r},{c})" for r, c in data['pv'])
+        return (f"[迭代加深] 深度 {data['depth']} 最佳 {data['move']} 评分 {data['score']} "
+                f"耗时 {data['time']:.3f}s 节点 {data['nodes']} 主要变例 {pv_text}")
+    if event == 'result':
+        lines = [f"[置换表] {data['tt']}"]
+        if data.get('stats') is not None:
+            lines.append(f"[搜索统计] {data['stats'].format()}")
+        lines.append(f"[AI决策] 最终选择坐标 {data['move']} 评分 {data['score']} (搜索深度 {data['depth']})")
+        return '\n'.join(lines)
+    return f"[{event}] {data}"
+
+
+def profile_call(func, sort: str = 'cumulative', limit: int = 30, path: Optional[str] = None):
+    """
+    用cProfile运行func()
+    :param sort: pstats排序字段
+    :param limit: 报告中列出的函数数
+    :param path: 给出时把报告写入该文件
+    :return: (func的返回值, 文本报告)
+    """
+    profiler = cProfile.Profile()
+    result = profiler.runcall(func)
+    buffer = io.StringIO()
+    pstats.Stats(profiler, stream=buffer).sort_stats(sort).print_stats(limit)
+    report = buffer.getvalue()
+    if path is not None:
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(report)
+    return result, report
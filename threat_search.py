@@ -0,0 +1,267 @@
+import time
+from itertools import combinations
+from typing import Dict, List, Optional, Tuple
+from bitboard import BitBoard, BOARD_MASK, MASK_STEPS, ROW_STRIDE, iter_positions
+
+'''
+威胁空间搜索（VCF/VCT）：
+1.只展开能形成威胁的走法：冲四（VCF，连续冲四取胜）以及冲四+活三（VCT，连续威胁取胜）
+2.防守方只考虑必须应对的点：挡住五连点、挡住对方可成四的点、或者自己冲四反击
+3.分支因子很小，可以搜到15~25层
+4.所有棋型判断都在整盘掩码上做：每行16位（带哨兵位），四个方向分别是移位1/16/17/15
+5.节点上限和截止时间由一次new_search()开始的所有find_*/defenses调用共用，用完后后续调用直接返回None
+'''
+
+# 四个方向在整盘掩码上的移位步长：水平、垂直、主对角线、反对角线
+STEPS = MASK_STEPS
+
+
+def _templates(length: int, own: int, ends_empty: bool) -> List[Tuple[Tuple[int, ...], Tuple[int, ...]]]:
+    """
+    生成棋型模板：长度为length的窗口中，目标格c为空，另有own个己方棋子，其余为空
+    ends_empty为True时窗口两端必须为空（用于活四/活三）
+    :return: [(己方棋子相对c的偏移, 其他空位相对c的偏移), ...]
+    """
+    inner = range(1, length - 1) if ends_empty else range(length)
+    result = []
+    for c in inner:
+        others = [i for i in inner if i != c]
+        for own_cells in combinations(others, own):
+            empties = [i for i in range(length) if i != c and i not in own_cells]
+            result.append((tuple(i - c for i in own_cells), tuple(i - c for i in empties)))
+    return result
+
+
+FIVE_TEMPLATES = _templates(5, 4, False)       # 落子后成五
+FOUR_TEMPLATES = _templates(5, 3, False)       # 落子后成四（出现五连点）
+OPEN_FOUR_TEMPLATES = _templates(6, 3, True)   # 落子后成活四
+THREE_TEMPLATES = _templates(6, 2, True)       # 落子后成活三（出现活四点）
+
+
+def _shift(bits: int, offset: int) -> int:
+    """让结果的第i位表示原掩码第i+offset位"""
+    return bits >> offset if offset >= 0 else bits << -offset
+
+
+def pattern_points(own: int, empty: int, templates) -> int:
+    """
+    在四个方向上匹配模板，返回所有满足条件的目标空位掩码
+    :param own: 己方整盘掩码
+    :param empty: 空位整盘掩码（已与BOARD_MASK相与）
+    """
+    result = 0
+    for step in STEPS:
+        own_shifted = {}
+        empty_shifted = {}
+        for own_offsets, empty_offsets in templates:
+            term = empty
+            for offset in own_offsets:
+                shifted = own_shifted.get(offset)
+                if shifted is None:
+                    shifted = own_shifted[offset] = _shift(own, offset * step)
+                term &= shifted
+                if not term:
+                    break
+            else:
+                for offset in empty_offsets:
+                    shifted = empty_shifted.get(offset)
+                    if shifted is None:
+                        shifted = empty_shifted[offset] = _shift(empty, offset * step)
+                    term &= shifted
+                    if not term:
+                        break
+            result |= term
+    return result
+
+
+def pattern_cells(own: int, empty: int, templates) -> int:
+    """
+    与pattern_points相同的匹配，但返回匹配窗口中所有的空位（目标格以及模板要求为空的格子）
+    """
+    result = 0
+    for step in STEPS:
+        for own_offsets, empty_offsets in templates:
+            term = empty
+            for offset in own_offsets:
+                term &= _shift(own, offset * step)
+            for offset in empty_offsets:
+                term &= _shift(empty, offset * step)
+            if term:
+                result |= term
+                for offset in empty_offsets:
+                    result |= _shift(term, -offset * step)
+    return result
+
+
+def _count(bits: int) -> int:
+    return bin(bits).count('1')
+
+
+class ThreatSearchAborted(Exception):
+    """超出节点上限、截止时间或被取消"""
+
+
+class ThreatSearcher:
+    """
+    威胁空间搜索器
+    找到强制胜利时返回进攻方的第一手，否则返回None
+    """
+
+    def __init__(self, node_limit: int = 20000, vcf_depth: int = 12, vct_depth: int = 5):
+        """
+        :param node_limit: 两次new_search()之间所有find_*/defenses调用共用的节点上限
+        :param vcf_depth: VCF中进攻方最多连续冲四的次数
+        :param vct_depth: VCT中进攻方最多连续威胁的次数
+        """
+        self.node_limit = node_limit
+        self.vcf_depth = vcf_depth
+        self.vct_depth = vct_depth
+        self.nodes = 0
+        self.aborted = False
+        self.deadline = None  # 截止时间（time.perf_counter()），None为不限时
+        self.cancel_event = None  # threading.Event，被set()时中断搜索
+        self.failed: Dict[Tuple[int, int, bool], int] = {}  # 已证明失败的局面 -> 失败时的剩余深度
+
+    def new_search(self, node_limit: Optional[int] = None, deadline: Optional[float] = None):
+        """
+        开始新一步的威胁搜索：清零节点计数，之后的调用共用node_limit和deadline
+        :param node_limit: 给出时替换节点上限
+        :param deadline: 截止时间（time.perf_counter()），None为不限时
+        """
+        if node_limit is not None:
+            self.node_limit = node_limit
+        self.deadline = deadline
+        self.nodes = 0
+        self.aborted = False
+
+    def five_points(self, board: BitBoard, player: int) -> int:
+        empty = BOARD_MASK & ~board.occupied
+        return pattern_points(board.stones[player - 1], empty, FIVE_TEMPLATES)
+
+    def four_points(self, board: BitBoard, player: int) -> int:
+        empty = BOARD_MASK & ~board.occupied
+        return pattern_points(board.stones[player - 1], empty, FOUR_TEMPLATES)
+
+    def three_points(self, board: BitBoard, player: int) -> int:
+        empty = BOARD_MASK & ~board.occupied
+        return pattern_points(board.stones[player - 1], empty, THREE_TEMPLATES)
+
+    def find_vcf(self, board: BitBoard, player: int) -> Optional[Tuple[int, int]]:
+        """寻找player（假设轮到player落子）的连续冲四胜"""
+        return self._run(board, player, self.vcf_depth, False)
+
+    def find_vct(self, board: BitBoard, player: int) -> Optional[Tuple[int, int]]:
+        """寻找player（假设轮到player落子）的连续威胁胜（包含冲四和活三）"""
+        return self._run(board, player, self.vct_depth, True)
+
+    def find_win(self, board: BitBoard, player: int) -> Optional[Tuple[int, int]]:
+        """先找VCF，找不到再找VCT"""
+        return self.find_vcf(board, player) or self.find_vct(board, player)
+
+    def defenses(self, board: BitBoard, player: int, moves: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+        """
+        对手（player的对方）有强制胜利时，从moves中筛选出落子后能化解的走法
+        只尝试对方的成四点、活三点以及己方的成四点，其余走法不可能化解
+        """
+        attacker = 3 - player
+        relevant = (self.four_points(board, attacker) | self.three_points(board, attacker)
+                    | self.four_points(board, player))
+        result = []
+        work = board.copy()
+        for move in moves:
+            if not (relevant >> (move[0] * ROW_STRIDE + move[1])) & 1:
+                continue
+            work.place(move[0], move[1], player)
+            # 超出预算而无法证明对方仍能取胜时，同样保留该走法交给Minimax判断
+            if work.is_five_at(move[0], move[1], player) or self.find_win(work, attacker) is None:
+                result.append(move)
+            work.remove(move[0], move[1], player)
+        return result
+
+    def _run(self, board: BitBoard, player: int, depth: int, allow_three: bool) -> Optional[Tuple[int, int]]:
+        if self.aborted:
+            return None  # 本步的预算已经用完
+        self.failed = {}
+        try:
+            return self._attack(board.copy(), player, depth, allow_three)
+        except ThreatSearchAborted:
+            self.aborted = True
+            return None
+
+    def _attack(self, board: BitBoard, player: int, depth: int, allow_three: bool) -> Optional[Tuple[int, int]]:
+        """进攻方节点：返回能强制取胜的走法"""
+        self.nodes += 1
+        if self.nodes > self.node_limit or (self.cancel_event is not None and self.cancel_event.is_set()):
+            raise ThreatSearchAborted()
+        # 每个节点要做多次整盘匹配（约0.1ms），每16个节点检查一次时间即可
+        if self.deadline is not None and self.nodes & 15 == 0 and time.perf_counter() >= self.deadline:
+            raise ThreatSearchAborted()
+
+        opponent = 3 - player
+        own_fives = self.five_points(board, player)
+        if own_fives:
+            return next(iter_positions(own_fives))  # 直接成五
+        if depth <= 0:
+            return None
+
+        key = (board.stones[0], board.stones[1], allow_three)
+        if self.failed.get(key, -1) >= depth:
+            return None
+
+        fours = self.four_points(board, player)
+        threes = self.three_points(board, player) & ~fours if allow_three else 0
+        opp_fives = self.five_points(board, opponent)
+        if opp_fives:
+            # 对方已有冲四，只能边挡边进攻
+            if _count(opp_fives) > 1:
+                self.failed[key] = depth
+                return None
+            fours &= opp_fives
+            threes &= opp_fives
+        elif allow_three:
+            # VCT节点先试连续冲四，多数VCT的结尾都是VCF，而VCF分支极少
+            move = self._attack(board, player, self.vcf_depth, False)
+            if move is not None:
+                return move
+
+        # 先冲四后活三
+        for candidates in (fours, threes):
+            for row, col in iter_positions(candidates):
+                board.place(row, col, player)
+                won = self._after_threat(board, player, depth, allow_three)
+                board.remove(row, col, player)
+                if won:
+                    return (row, col)
+
+        self.failed[key] = depth
+        return None
+
+    def _after_threat(self, board: BitBoard, player: int, depth: int, allow_three: bool) -> bool:
+        """进攻方刚落子，判断防守方的所有合理应对是否都失败"""
+        opponent = 3 - player
+        threats = self.five_points(board, player)
+        if _count(threats) >= 2:
+            return True  # 活四或双四，挡不住
+        if threats:
+            # 冲四：防守方唯一应对是挡住五连点
+            responses = threats
+        elif allow_three:
+            empty = BOARD_MASK & ~board.occupied
+            open_four_cells = pattern_cells(board.stones[player - 1], empty, OPEN_FOUR_TEMPLATES)
+            if not open_four_cells:
+                return False  # 没有活四点，不构成威胁
+            # 活三：防守方只能占进攻方成活四所需的空位（活四点及其两端），或者自己冲四反击
+            responses = open_four_cells | self.four_points(board, opponent)
+        else:
+            return False
+
+        for row, col in iter_positions(responses):
+            board.place(row, col, opponent)
+            if board.is_five_at(row, col, opponent):
+                won = False
+            else:
+                won = self._attack(board, player, depth - 1, allow_three) is not None
+            board.remove(row, col, opponent)
+            if not won:
+                return False
+        return True
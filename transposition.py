@@ -0,0 +1,119 @@
+import random
+import sys
+from typing import Dict, Optional, Tuple
+from bitboard import BitBoard, BOARD_SIZE, iter_positions
+
+'''
+Zobrist哈希与置换表：
+1.每个(玩家, 格子)对应一个64位随机数，局面哈希为所有棋子随机数的异或，落子/撤销时异或一次即可增量维护
+2.置换表为固定槽位数的数组，按哈希取模定位，深度优先替换（更深的搜索结果不会被浅的覆盖）
+3.表项记录搜索深度、分数的性质（精确值/下界/上界）以及该局面的最佳走法
+4.统计命中、未命中、冲突次数，便于按服务器内存预算调整表大小
+'''
+
+EXACT = 0  # 精确值
+LOWER = 1  # 下界（发生beta剪枝）
+UPPER = 2  # 上界（所有走法都不超过alpha）
+
+# 固定种子，保证不同进程（并行搜索、开局库）得到相同的哈希
+_rng = random.Random(20240615)
+ZOBRIST_KEYS = [[_rng.getrandbits(64) for _ in range(BOARD_SIZE * BOARD_SIZE)] for _ in range(2)]
+ZOBRIST_SIDE = _rng.getrandbits(64)  # 轮到最大化一方时异或
+
+
+def zobrist_hash(board: BitBoard) -> int:
+    """全盘计算哈希（只在根节点调用，之后增量维护）"""
+    key = 0
+    for p in range(2):
+        keys = ZOBRIST_KEYS[p]
+        for r, c in iter_positions(board.stones[p]):
+            key ^= keys[r * BOARD_SIZE + c]
+    return key
+
+
+class TranspositionTable:
+    """
+    定长置换表，表项为(哈希, 深度, 标志, 分数, 最佳走法)
+    """
+
+    def __init__(self, size: int = 1 << 18):
+        """
+        :param size: 槽位数，每个已填充槽位约占ENTRY_BYTES字节
+        """
+        self.size = size
+        self.slots = [None] * size
+        self.hits = 0
+        self.misses = 0
+        self.collisions = 0  # 槽位被其他局面占用
+        self.stores = 0
+        self.replacements = 0  # 覆盖了其他局面的表项
+        self.rejected = 0  # 深度优先：旧表项更深，放弃写入
+        self.filled = 0
+
+    def probe(self, key: int) -> Optional[Tuple[int, int, int, int, Optional[Tuple[int, int]]]]:
+        """
+        查询局面
+        :return: 命中时返回表项，否则返回None
+        """
+        entry = self.slots[key % self.size]
+        if entry is not None and entry[0] == key:
+            self.hits += 1
+            return entry
+        self.misses += 1
+        if entry is not None:
+            self.collisions += 1
+        return None
+
+    def store(self, key: int, depth: int, flag: int, score, best_move: Optional[Tuple[int, int]]):
+        """
+        写入局面，槽位被占用时只有新结果不比旧结果浅才覆盖
+        """
+        index = key % self.size
+        entry = self.slots[index]
+        if entry is None:
+            self.filled += 1
+        elif entry[0] != key:
+            if entry[1] > depth:
+                self.rejected += 1
+                return
+            self.replacements += 1
+        elif entry[1] > depth:
+            # 同一局面已有更深的结果，保留旧结果
+            self.rejected += 1
+            return
+        self.slots[index] = (key, depth, flag, score, best_move)
+        self.stores += 1
+
+    def clear(self):
+        self.slots = [None] * self.size
+        self.filled = 0
+
+    def reset_stats(self):
+        self.hits = self.misses = self.collisions = 0
+        self.stores = self.replacements = self.rejected = 0
+
+    def approx_bytes(self) -> int:
+        """估算当前占用内存（槽位数组+已填充表项）"""
+        return sys.getsizeof(self.slots) + self.filled * ENTRY_BYTES
+
+    def stats(self) -> Dict[str, float]:
+        """命中/未命中/冲突等计数，以及填充率和估算内存"""
+        probes = self.hits + self.misses
+        return {
+            'size': self.size,
+            'filled': self.filled,
+            'fill_rate': self.filled / self.size,
+            'hits': self.hits,
+            'misses': self.misses,
+            'collisions': self.collisions,
+            'hit_rate': self.hits / probes if probes else 0.0,
+            'stores': self.stores,
+            'replacements': self.replacements,
+            'rejected': self.rejected,
+            'approx_bytes': self.approx_bytes(),
+        }
+
+
+# 单个表项的大致内存：元组本身+64位哈希+最佳走法元组（小整数由解释器缓存）
+ENTRY_BYTES = (sys.getsizeof((0, 0, 0, 0, None)) + sys.getsizeof(1 << 63)
+               + sys.getsizeof((7, 7)))
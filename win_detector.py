@@ -0,0 +1,33 @@
+import numpy as np
+from typing import Optional
+from bitboard import BOARD_SIZE, ROW_STRIDE, BLACK, WHITE, mask_has_five
+
+'''
+全盘胜负判定（game_core与ai_player共用）：
+1.把15x15的Numpy棋盘按每行16位（带哨兵位）打包成一个Python整数，与BitBoard的整盘掩码布局相同
+2.四个方向的五连检查都是整数的移位+与运算（bitboard.mask_has_five），不再逐格循环
+3.搜索中只检查最后一步经过的四条线（BitBoard.is_five_at），这里用于根节点和GomokuGame
+'''
+
+
+def stone_mask(board, player: int) -> int:
+    """将Numpy棋盘中player的棋子打包为整盘掩码（第row*16+col位）"""
+    padded = np.zeros((BOARD_SIZE, ROW_STRIDE), dtype=bool)
+    padded[:, :BOARD_SIZE] = np.asarray(board) == player
+    return int.from_bytes(np.packbits(padded, bitorder='little').tobytes(), 'little')
+
+
+def has_five(board, player: int) -> bool:
+    """player是否已有五子连珠"""
+    return mask_has_five(stone_mask(board, player))
+
+
+def find_winner(board) -> Optional[int]:
+    """
+    检查棋盘上是否有获胜方
+    :return: 获胜方（BLACK/WHITE）或None
+    """
+    for player in (BLACK, WHITE):
+        if has_five(board, player):
+            return player
+    return None